@@ -0,0 +1,225 @@
+"""
+Run the agent flows end to end against the local fixture site
+(benchmarks/fixture_site.py) and report per-stage latency percentiles and
+task throughput:
+
+    manager    ChargeManager: station search, wait, parse, evaluate, select
+    system     ChargeSystem: predict, perform, train
+    assistant  ChargeAssistant: understand, capture, recognize, perform
+
+Needs Chrome; the assistant also needs its model weights. Results can be
+saved as a baseline and later runs compared against it, failing (exit
+status 1) when a stage's p50 or p95 regressed by more than --tolerance.
+Run from the repository root:
+
+    python -m benchmarks.bench_agents --save-baseline baseline.json
+    python -m benchmarks.bench_agents --compare baseline.json
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+import numpy as np
+from benchmarks.fixture_site import FixtureSite
+from chargepools import BrowserPool
+
+USER_PREFERENCES = {
+    'max_price': 10,
+    'min_speed': 50,
+    'preferred_time': 1200,
+    'preferred_location': 'Tokyo'
+}
+
+# Agent -> (task, {method name: stage name})
+AGENT_STAGES = {
+    'manager': ("Find a charging station in Tokyo for 2 hours.", {
+        'search_stations': 'search', 'parse_charge_stations': 'parse',
+        'evaluate_charge_stations': 'evaluate', 'select_charge_station': 'select'}),
+    'system': ("Process a payment on the charge system", {
+        'predict_action': 'predict', 'perform_action': 'perform', 'train_model': 'train'}),
+    'assistant': ("Find and proceed with payment on the page", {
+        'understand_language': 'understand', 'capture_screenshot': 'capture',
+        'recognize_frame': 'recognize', 'perform_action': 'perform'}),
+}
+
+
+class StageTimer:
+    """
+    Records how long instrumented methods of an agent take, per stage.
+    """
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def instrument(self, agent: Any, stages: Dict[str, str]):
+        """
+        Wrap agent's methods (on the instance only) so every call is timed.
+        """
+        for method_name, stage in stages.items():
+            setattr(agent, method_name, self._timed(getattr(agent, method_name), stage))
+
+    def _timed(self, method, stage: str):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.samples[stage].append(time.perf_counter() - start)
+        return timed
+
+    def record(self, stage: str, seconds: float):
+        self.samples[stage].append(seconds)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1e3
+    return {'count': len(values), 'mean_ms': float(values.mean()), 'p50_ms': float(np.percentile(values, 50)),
+            'p95_ms': float(np.percentile(values, 95)), 'p99_ms': float(np.percentile(values, 99))}
+
+
+def create_agent(name: str, site: FixtureSite, pool: BrowserPool, workdir: str):
+    if name == 'manager':
+        from chargedecides import ChargeManager
+        agent = ChargeManager(USER_PREFERENCES, pool=pool)
+        agent.site_url = site.url('/stations')
+    elif name == 'system':
+        from chargelearns import ChargeSystem
+        from chargeregistry import ModelRegistry
+        # Keep trained models out of the working directory
+        agent = ChargeSystem(pool=pool, registry=ModelRegistry(f"{workdir}/models"))
+        agent.site_url = site.url('/charge-system')
+    else:
+        from chargerecognizes import ChargeAssistant
+        agent = ChargeAssistant(pool=pool)
+        agent.payment_url = site.url('/payment')
+    return agent
+
+
+def run_agent(name: str, site: FixtureSite, pool: BrowserPool, runs: int, warmup: int, workdir: str,
+              verbose: bool) -> Dict[str, Any]:
+    task, stages = AGENT_STAGES[name]
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    agent = None
+    with output:
+        try:
+            start = time.perf_counter()
+            agent = create_agent(name, site, pool, workdir)
+            construct = time.perf_counter() - start
+            for _ in range(warmup):
+                agent.execute_task(task)
+
+            timer = StageTimer()
+            timer.instrument(agent, stages)
+            waits_before = agent.waiter.waits if agent.waiter is not None else 0
+            start = time.perf_counter()
+            for _ in range(runs):
+                task_start = time.perf_counter()
+                agent.execute_task(task)
+                timer.record('task', time.perf_counter() - task_start)
+            elapsed = time.perf_counter() - start
+        finally:
+            # A failed agent must not keep the pool's session from the next one
+            if agent is not None:
+                agent._close_driver()
+
+    if agent.waiter is not None:
+        # Only the most recent waits are kept; take those of the measured runs
+        waits = min(agent.waiter.waits - waits_before, len(agent.waiter.timings))
+        for timing in list(agent.waiter.timings)[len(agent.waiter.timings) - waits:]:
+            timer.record('wait', timing['elapsed'])
+    return {'construct_s': construct, 'throughput_per_s': runs / elapsed,
+            'stages': {stage: percentiles(samples) for stage, samples in timer.samples.items()}}
+
+
+def print_results(results: Dict[str, Any]):
+    for name, result in results.items():
+        if 'error' in result:
+            print(f"{name}: skipped ({result['error']})")
+            continue
+        print(f"{name}: {result['throughput_per_s']:.2f} tasks/s, constructed in {result['construct_s']:.2f}s")
+        print(f"  {'stage':>10} {'count':>6} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+        for stage, stats in result['stages'].items():
+            print(f"  {stage:>10} {stats['count']:>6} {stats['mean_ms']:>8.1f}ms {stats['p50_ms']:>8.1f}ms "
+                  f"{stats['p95_ms']:>8.1f}ms {stats['p99_ms']:>8.1f}ms")
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Print each stage's change against the baseline and return the regressions.
+    """
+    regressions = []
+    print(f"Compared with baseline (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if 'error' in result or old is None or 'error' in old:
+            continue
+        for stage, stats in result['stages'].items():
+            old_stats = old['stages'].get(stage)
+            if old_stats is None:
+                continue
+            for key in ('p50_ms', 'p95_ms'):
+                change = stats[key] / old_stats[key] - 1 if old_stats[key] else 0.0
+                flag = ''
+                if change > tolerance:
+                    flag = '  REGRESSION'
+                    regressions.append(f"{name}.{stage}.{key}")
+                print(f"  {name}.{stage}.{key}: {old_stats[key]:.1f}ms -> {stats[key]:.1f}ms ({change:+.1%}){flag}")
+        change = result['throughput_per_s'] / old['throughput_per_s'] - 1
+        print(f"  {name}.throughput: {old['throughput_per_s']:.2f}/s -> {result['throughput_per_s']:.2f}/s ({change:+.1%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agents', nargs='+', choices=list(AGENT_STAGES), default=list(AGENT_STAGES))
+    parser.add_argument('--runs', type=int, default=20, help="Measured tasks per agent")
+    parser.add_argument('--warmup', type=int, default=2, help="Unmeasured tasks per agent first")
+    parser.add_argument('--stations', type=int, default=50, help="Station cards per search")
+    parser.add_argument('--buttons', type=int, default=10, help="Extra buttons on the payment page")
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated server latency in seconds")
+    parser.add_argument('--save-baseline', metavar='PATH')
+    parser.add_argument('--compare', metavar='PATH', help="Baseline to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before a stage regresses")
+    parser.add_argument('--acquire-timeout', type=float, default=60.0,
+                        help="Seconds an agent may wait for the browser session")
+    parser.add_argument('--verbose', action='store_true', help="Show the agents' own output")
+    args = parser.parse_args(argv)
+
+    settings = {name: getattr(args, name) for name in ('runs', 'warmup', 'stations', 'buttons', 'latency')}
+    results = {}
+    with FixtureSite(args.stations, args.buttons, args.latency) as site, \
+            tempfile.TemporaryDirectory(prefix='charge_bench_') as workdir:
+        # The timeout turns a session that is never released into an error instead of a hang
+        pool = BrowserPool(max_sessions=1, acquire_timeout=args.acquire_timeout)
+        try:
+            for name in args.agents:
+                try:
+                    results[name] = run_agent(name, site, pool, args.runs, args.warmup, workdir, args.verbose)
+                except Exception as e:
+                    # One agent failing (e.g. missing model weights) should not lose the others' results
+                    results[name] = {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            pool.close()
+
+    print_results(results)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'settings': settings, 'results': results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print(f"Warning: baseline settings {baseline.get('settings')} differ from {settings}")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Compare assigning a fleet to charging stations with one FleetPlanner call
+against repeated single-vehicle calls:
+
+    independent  StationScorer(vehicle).best(stations) per vehicle, as
+                 evaluate_charge_stations does; ignores capacity, so
+                 several vehicles pick the same charger slot
+    greedy       each vehicle in turn takes its best charger slot still
+                 free (one score_matrix row per call)
+    planner      FleetPlanner.plan, one optimal assignment for the fleet
+
+and report time, total score, vehicles assigned and overbooked slots.
+Vehicles and stations are spread around a few Japanese cities. Run from
+the repository root:
+
+    python -m benchmarks.bench_fleet
+"""
+import argparse
+import time
+from collections import Counter
+from typing import List, Dict, Any
+import numpy as np
+from chargefleets import FleetPlanner
+from chargescores import StationScorer, score_station
+from benchmarks.fixture_site import CITY_COORDS
+
+CITIES = list(CITY_COORDS)
+
+
+def generate_stations(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    cities = rng.choice(CITIES, count)
+    offsets = rng.normal(0, 0.1, (count, 2))
+    return [
+        {'price': float(price), 'charging_speed': int(speed), 'available_time': int(hour) * 3600,
+         'location': str(city), 'latitude': CITY_COORDS[city][0] + offset[0],
+         'longitude': CITY_COORDS[city][1] + offset[1], 'capacity': int(capacity)}
+        for city, offset, price, speed, hour, capacity in zip(
+            cities, offsets, rng.uniform(1, 20, count).round(2), rng.choice([22, 50, 100, 150, 350], count),
+            rng.integers(6, 22, count), rng.integers(1, 5, count))
+    ]
+
+
+def generate_vehicles(count: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """
+    Per-vehicle user preferences; half the vehicles give coordinates.
+    """
+    rng = np.random.default_rng(seed)
+    cities = rng.choice(CITIES, count)
+    offsets = rng.normal(0, 0.1, (count, 2))
+    vehicles = []
+    for i, (city, offset, max_price, min_speed, hour) in enumerate(zip(
+            cities, offsets, rng.uniform(5, 20, count), rng.choice([22, 50, 100], count), rng.integers(6, 22, count))):
+        vehicle = {'max_price': float(max_price), 'min_speed': int(min_speed), 'preferred_time': int(hour) * 3600,
+                   'preferred_location': str(city)}
+        if i % 2:
+            vehicle['preferred_coords'] = (CITY_COORDS[city][0] + offset[0], CITY_COORDS[city][1] + offset[1])
+        vehicles.append(vehicle)
+    return vehicles
+
+
+def independent(vehicles: List[Dict[str, Any]], stations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    picks = [StationScorer(vehicle).best(stations) for vehicle in vehicles]
+    seconds = time.perf_counter() - start
+    total = sum(score_station(vehicle, station) for vehicle, station in zip(vehicles, picks))
+    # Every pick is the station's first slot; vehicles beyond its capacity are overbooked
+    booked = Counter(map(id, picks))
+    overbooked = sum(max(0, booked[id(station)] - station['capacity']) for station in stations)
+    return {'seconds': seconds, 'total_score': total, 'assigned': len(picks), 'overbooked': overbooked}
+
+
+def greedy(planner: FleetPlanner, vehicles: List[Dict[str, Any]], stations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    columns = planner.slot_columns(stations)
+    free = np.ones(len(columns['station']), dtype=bool)
+    total, assigned = 0.0, 0
+    for vehicle in vehicles:
+        scores = planner.score_matrix([vehicle], stations, columns)[0]
+        scores[~free] = -np.inf
+        column = int(np.argmax(scores))
+        if np.isfinite(scores[column]):
+            free[column] = False
+            total += scores[column]
+            assigned += 1
+    return {'seconds': time.perf_counter() - start, 'total_score': total, 'assigned': assigned, 'overbooked': 0}
+
+
+def planned(planner: FleetPlanner, vehicles: List[Dict[str, Any]], stations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    result = planner.plan(vehicles, stations)
+    taken = Counter((a['station_index'], a['slot']) for a in result['assignments'] if a is not None)
+    overbooked = sum(max(0, n - stations[station].get('capacity', planner.capacity))
+                     for (station, _), n in taken.items())
+    return {'seconds': result['seconds'], 'total_score': result['total_score'], 'assigned': sum(taken.values()),
+            'overbooked': overbooked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vehicles', type=int, nargs='+', default=[100, 1_000, 3_000])
+    parser.add_argument('--stations', type=int, default=1_000)
+    parser.add_argument('--slots', type=int, default=2, help="Consecutive one-hour slots per charger")
+    args = parser.parse_args()
+
+    stations = generate_stations(args.stations)
+    planner = FleetPlanner(slots=args.slots)
+
+    # The score matrix must follow score_station (slot 0 starts at available_time)
+    sample = generate_vehicles(20)
+    columns = planner.slot_columns(stations)
+    first_slots = np.flatnonzero(columns['slot'] == 0)
+    matrix = planner.score_matrix(sample, stations, columns)[:, first_slots]
+    expected = [[score_station(v, stations[s]) for s in columns['station'][first_slots]] for v in sample]
+    assert np.allclose(matrix, expected)
+    planner.plan(sample, stations)  # Warm up: imports SciPy
+
+    print(f"{args.stations} stations, {len(columns['station'])} charger slots")
+    print(f"{'vehicles':>10} {'method':>12} {'time':>10} {'total score':>12} {'assigned':>9} {'overbooked':>11}")
+    for count in args.vehicles:
+        vehicles = generate_vehicles(count)
+        results = {'independent': independent(vehicles, stations),
+                   'greedy': greedy(planner, vehicles, stations),
+                   'planner': planned(planner, vehicles, stations)}
+        assert results['planner']['overbooked'] == 0
+        assert results['planner']['total_score'] >= results['greedy']['total_score'] - 1e-6
+        for method, result in results.items():
+            print(f"{count:>10} {method:>12} {result['seconds'] * 1e3:>8.1f}ms {result['total_score']:>12.1f} "
+                  f"{result['assigned']:>9} {result['overbooked']:>11}")
+
+
+if __name__ == '__main__':
+    main()
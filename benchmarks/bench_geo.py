@@ -0,0 +1,68 @@
+"""
+Compare a linear haversine scan against the StationIndex grid for
+within-radius and k-nearest queries over a national-scale catalog, and
+time nearby top-k scoring with and without index prefiltering. Stations
+are spread over Japan. Run from the repository root:
+
+    python -m benchmarks.bench_geo
+"""
+import argparse
+import time
+import numpy as np
+from chargegeo import StationIndex, haversine_km
+from chargescores import StationScorer
+from benchmarks.bench_scoring import USER_PREFERENCES, best_of, generate_stations
+
+TOKYO = (35.68, 139.76)
+
+
+def add_coordinates(stations, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(31.0, 45.5, len(stations))
+    longitudes = rng.uniform(129.5, 145.8, len(stations))
+    for station, latitude, longitude in zip(stations, latitudes, longitudes):
+        station['latitude'], station['longitude'] = float(latitude), float(longitude)
+    return latitudes, longitudes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--radius', type=float, default=25.0, help="Search radius in km")
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    preferences = dict(USER_PREFERENCES, preferred_coords=TOKYO, proximity_radius_km=args.radius)
+    scorer = StationScorer(preferences)
+    print(f"{'stations':>10} {'build':>10} {'scan':>10} {'within':>10} {'nearest':>10} "
+          f"{'top-k all':>10} {'top-k near':>11}")
+    for size in args.sizes:
+        stations = generate_stations(size)
+        latitudes, longitudes = add_coordinates(stations)
+
+        start = time.perf_counter()
+        index = StationIndex(latitudes, longitudes)
+        t_build = time.perf_counter() - start
+
+        # The index must agree with a full scan
+        distances = haversine_km(TOKYO[0], TOKYO[1], latitudes, longitudes)
+        indices, _ = index.within(*TOKYO, args.radius)
+        assert set(indices.tolist()) == set(np.flatnonzero(distances <= args.radius).tolist())
+        nearest, _ = index.nearest(*TOKYO, args.k)
+        assert np.allclose(np.sort(distances[nearest]), np.sort(distances)[:args.k])
+        nearby = scorer.top_k_nearby(stations, index, args.k)
+        assert nearby == scorer.top_k([stations[i] for i in np.flatnonzero(distances <= args.radius)], args.k)
+
+        t_scan = best_of(lambda: np.flatnonzero(haversine_km(TOKYO[0], TOKYO[1], latitudes, longitudes)
+                                                <= args.radius), args.repeat)
+        t_within = best_of(lambda: index.within(*TOKYO, args.radius), args.repeat)
+        t_nearest = best_of(lambda: index.nearest(*TOKYO, args.k), args.repeat)
+        t_all = best_of(lambda: scorer.top_k(stations, args.k), args.repeat)
+        t_near = best_of(lambda: scorer.top_k_nearby(stations, index, args.k), args.repeat)
+        print(f"{size:>10} {t_build * 1e3:>8.1f}ms {t_scan * 1e3:>8.2f}ms {t_within * 1e3:>8.3f}ms "
+              f"{t_nearest * 1e3:>8.3f}ms {t_all * 1e3:>8.1f}ms {t_near * 1e3:>9.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Compare fp32 and int8 (dynamically quantized) CPU inference for the two
+models the agents run: the BERT instruction encoder and the ResNet-18 UI
+classifier. For each model the report shows per-call latency (p50/p95),
+batched throughput, serialized model size, how much the process's
+resident memory (RSS) grew while loading or quantizing the model, and how
+far the int8 outputs drift from fp32 (cosine similarity, plus top-1
+agreement for ResNet).
+Run from the repository root:
+
+    python -m benchmarks.bench_inference
+    python -m benchmarks.bench_inference --bert path/to/local/bert --threads 1
+
+ResNet-18 uses random weights unless --pretrained is given; quantization
+error depends on the weights, so use --pretrained for the real numbers.
+"""
+import argparse
+import gc
+import io
+import time
+import numpy as np
+import torch
+from torchvision.models import resnet18
+from chargeencoders import TextEncoder, optimize_for_cpu
+from chargeregistry import memory_usage
+
+INSTRUCTIONS = [
+    "Find a charging station in Tokyo for 2 hours.",
+    "Process a payment on the charge system",
+    "Optimize trading strategy for Solana with front-running on the market",
+    "Find and proceed with payment on the page",
+    "Book the cheapest fast charger near Shibuya this evening",
+    "Cancel my reservation and refund the deposit",
+    "Show stations with at least 150 kW available after 18:00",
+    "Pay with the saved card and confirm the booking",
+]
+
+
+def rss() -> int:
+    gc.collect()
+    return memory_usage()['rss']
+
+
+def model_size(model: torch.nn.Module) -> int:
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def time_calls(fn, inputs, repeat):
+    times = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1e3, np.percentile(times, 95) * 1e3
+
+
+def time_batch(fn, batch, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(batch)
+    return repeat * len(batch) / (time.perf_counter() - start)
+
+
+def cosine(a: torch.Tensor, b: torch.Tensor) -> np.ndarray:
+    return torch.nn.functional.cosine_similarity(a.flatten(1), b.flatten(1)).numpy()
+
+
+def report(name, p50, p95, throughput, size, rss_before, rss_after):
+    print(f"{name:>12} {p50:>8.2f}ms {p95:>8.2f}ms {throughput:>10.1f}/s {size / 2 ** 20:>9.1f}MB "
+          f"{rss_before / 2 ** 20:>9.1f}MB {rss_after / 2 ** 20:>9.1f}MB")
+
+
+def bench_bert(model_name, repeat, threads):
+    print(f"BERT encoder ({model_name})")
+    encoders = {'fp32': TextEncoder(model_name, num_threads=threads),
+                'int8': TextEncoder(model_name, optimized=True, num_threads=threads)}
+    outputs = {}
+    for name, encoder in encoders.items():
+        # Weights load (and int8 quantizes) on first use
+        rss_before = rss()
+        encoder._load()
+        rss_after = rss()
+        encoder.encode(INSTRUCTIONS[:1])  # Warm up
+        p50, p95 = time_calls(lambda text: encoder.encode([text]), INSTRUCTIONS, repeat)
+        throughput = time_batch(encoder.encode, INSTRUCTIONS, repeat)
+        report(name, p50, p95, throughput, model_size(encoder.model), rss_before, rss_after)
+        outputs[name] = torch.stack(encoder.encode(INSTRUCTIONS))
+    similarity = cosine(outputs['fp32'], outputs['int8'])
+    print(f"  [CLS] cosine similarity fp32 vs int8: mean {similarity.mean():.4f}, min {similarity.min():.4f}")
+
+
+def bench_resnet(pretrained, repeat, batch_size, threads):
+    print(f"ResNet-18 UI classifier ({'pretrained' if pretrained else 'random'} weights)")
+    if threads is not None:
+        torch.set_num_threads(threads)
+    torch.manual_seed(0)
+    memory = {'fp32': (rss(),)}
+    fp32 = resnet18(pretrained=pretrained)
+    fp32.fc = torch.nn.Linear(512, 100)
+    fp32.eval()
+    memory['fp32'] += (rss(),)
+    # quantize_dynamic returns a copy, so the fp32 model stays available for comparison
+    int8 = optimize_for_cpu(fp32, threads)
+    memory['int8'] = (memory['fp32'][1], rss())
+
+    images = torch.rand(batch_size, 3, 224, 224)
+    outputs = {}
+    for name, model in (('fp32', fp32), ('int8', int8)):
+        with torch.inference_mode():
+            model(images[:1])
+            p50, p95 = time_calls(model, [image.unsqueeze(0) for image in images], repeat)
+            throughput = time_batch(model, images, repeat)
+            outputs[name] = model(images)
+        report(name, p50, p95, throughput, model_size(model), *memory[name])
+    similarity = cosine(outputs['fp32'], outputs['int8'])
+    agreement = (outputs['fp32'].argmax(1) == outputs['int8'].argmax(1)).float().mean().item()
+    print(f"  logit cosine similarity fp32 vs int8: mean {similarity.mean():.4f}, min {similarity.min():.4f}; "
+          f"top-1 agreement {agreement:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bert', default='bert-base-uncased', help="Model name or local path for the encoder")
+    parser.add_argument('--pretrained', action='store_true', help="Download pretrained ResNet-18 weights")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=8, help="Screenshots per ResNet batch")
+    parser.add_argument('--threads', type=int, help="Torch thread count (default: torch's own)")
+    parser.add_argument('--skip-bert', action='store_true')
+    parser.add_argument('--skip-resnet', action='store_true')
+    args = parser.parse_args()
+
+    # size is the serialized state dict; rss is resident memory before and after loading or quantizing
+    print(f"{'':>12} {'call p50':>10} {'call p95':>10} {'throughput':>12} {'size':>11} "
+          f"{'rss before':>11} {'rss after':>11}")
+    if not args.skip_bert:
+        bench_bert(args.bert, args.repeat, args.threads)
+    if not args.skip_resnet:
+        bench_resnet(args.pretrained, args.repeat, args.batch, args.threads)
+
+
+if __name__ == '__main__':
+    main()
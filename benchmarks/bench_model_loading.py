@@ -0,0 +1,100 @@
+"""
+Measure model load time and per-worker memory for three ways of serving one
+model from several worker processes:
+
+    heap     every worker runs a plain joblib.load
+    mmap     every worker loads the registry artifact memory-mapped
+    preload  a parent loads once and forks the workers, which share the
+             model's pages copy-on-write
+
+scikit-learn copies tree nodes into its own buffers when unpickling, so
+memory-mapping mostly saves load time. Sharing memory between workers
+needs the preload-and-fork layout. Memory is reported per worker as RSS
+and as PSS, which splits shared pages between the processes that map
+them. Run from the repository root:
+
+    python -m benchmarks.bench_model_loading
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from chargeregistry import ModelRegistry, memory_usage
+
+_preloaded = None
+
+
+def serve(model, barrier):
+    model.set_params(n_jobs=1)
+    # Touch every tree, as serving predictions would
+    model.predict(np.zeros((1, model.n_features_in_)))
+    # Measure while every worker still holds the model so shared pages are split between them
+    barrier.wait()
+    usage = memory_usage()
+    barrier.wait()
+    return usage
+
+
+def load_in_worker(args):
+    root, mmap, barrier = args
+    start = time.perf_counter()
+    model, schema, version = ModelRegistry(root).load(mmap=mmap)
+    elapsed = time.perf_counter() - start
+    return elapsed, serve(model, barrier)
+
+
+def use_preloaded(barrier):
+    return serve(_preloaded, barrier)
+
+
+def preload_and_fork(root, workers, barrier, results):
+    global _preloaded
+    start = time.perf_counter()
+    _preloaded, _, _ = ModelRegistry(root).load()
+    elapsed = time.perf_counter() - start
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        results.put([(elapsed, usage) for usage in pool.map(use_preloaded, [barrier] * workers)])
+
+
+def report(mode, results):
+    load_times = [elapsed for elapsed, _ in results]
+    rss = np.mean([usage.get('rss', 0) for _, usage in results]) / 2 ** 20
+    pss = np.mean([usage.get('pss', 0) for _, usage in results]) / 2 ** 20
+    print(f"{mode:>8} {np.median(load_times) * 1e3:>8.1f}ms {max(load_times) * 1e3:>8.1f}ms "
+          f"{rss:>10.1f}MB {pss:>10.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X, y = rng.uniform(0, 1000, (args.rows, 3)), rng.uniform(0, 1, args.rows)
+    model = RandomForestRegressor(n_estimators=args.trees, n_jobs=-1).fit(X, y)
+    root = tempfile.mkdtemp(prefix='charge_models_')
+    ModelRegistry(root).save(model)
+    print(f"Model with {args.trees} trees saved to {root}")
+
+    spawn = multiprocessing.get_context('spawn')
+    print(f"{'mode':>8} {'load p50':>10} {'load max':>10} {'rss/worker':>12} {'pss/worker':>12}")
+    with spawn.Manager() as manager:
+        barrier = manager.Barrier(args.workers)
+        for mmap in (False, True):
+            with spawn.Pool(args.workers) as pool:
+                report('mmap' if mmap else 'heap', pool.map(load_in_worker, [(root, mmap, barrier)] * args.workers))
+
+        # Pool workers cannot fork, so the preloading parent is a plain process
+        results = spawn.Queue()
+        parent = spawn.Process(target=preload_and_fork, args=(root, args.workers, barrier, results))
+        parent.start()
+        report('preload', results.get())
+        parent.join()
+
+
+if __name__ == '__main__':
+    main()
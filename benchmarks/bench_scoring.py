@@ -0,0 +1,74 @@
+"""
+Compare per-station scoring (sort with a Python key function) against the
+columnar StationScorer. Run from the repository root:
+
+    python -m benchmarks.bench_scoring
+"""
+import argparse
+import time
+from typing import List, Dict, Any
+import numpy as np
+from chargescores import StationScorer, score_station, stations_to_columns
+
+USER_PREFERENCES = {
+    'max_price': 10,
+    'min_speed': 50,
+    'preferred_time': 1200,
+    'preferred_location': 'Tokyo'
+}
+LOCATIONS = ['Tokyo', 'Osaka', 'Kyoto', 'Nagoya', 'Sapporo']
+
+
+def generate_stations(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate random station dicts shaped like parse_charge_stations output.
+    """
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(1, 20, count).round(2)
+    speeds = rng.integers(10, 350, count)
+    times = rng.integers(0, 2400, count)
+    locations = rng.choice(LOCATIONS, count)
+    return [
+        {'price': float(p), 'charging_speed': int(s), 'available_time': int(t), 'location': str(l)}
+        for p, s, t, l in zip(prices, speeds, times, locations)
+    ]
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    scorer = StationScorer(USER_PREFERENCES)
+    print(f"{'stations':>10} {'sorted':>10} {'best':>10} {'top-k':>10} {'columns':>10} {'scored':>10} {'speedup':>8}")
+    for size in args.sizes:
+        stations = generate_stations(size)
+
+        legacy = sorted(stations, key=lambda s: score_station(USER_PREFERENCES, s), reverse=True)
+        assert scorer.best(stations) is legacy[0]
+        assert scorer.top_k(stations, args.top_k) == legacy[:args.top_k]
+
+        columns = stations_to_columns(stations)
+        t_sorted = best_of(lambda: sorted(stations, key=lambda s: score_station(USER_PREFERENCES, s), reverse=True)[0], args.repeat)
+        t_best = best_of(lambda: scorer.best(stations), args.repeat)
+        t_top_k = best_of(lambda: scorer.top_k(stations, args.top_k), args.repeat)
+        t_columns = best_of(lambda: stations_to_columns(stations), args.repeat)
+        # Scoring alone, for callers that keep stations in columnar form
+        t_scored = best_of(lambda: scorer.top_k_indices(scorer.score_columns(columns), args.top_k), args.repeat)
+        print(f"{size:>10} {t_sorted * 1e3:>8.1f}ms {t_best * 1e3:>8.1f}ms {t_top_k * 1e3:>8.1f}ms "
+              f"{t_columns * 1e3:>8.1f}ms {t_scored * 1e3:>8.1f}ms {t_sorted / t_best:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
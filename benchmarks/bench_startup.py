@@ -0,0 +1,86 @@
+"""
+Measure startup cost per agent: how long a fresh interpreter takes to
+import the agent module, and optionally how long the first task takes
+(construction plus one execute_task through chargecli) against the local
+fixture site (benchmarks/fixture_site.py). First-task runs need Chrome and
+the agents' model weights; an agent whose task fails is reported as
+failed. Run from the repository root:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --first-task --pool
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from chargecli import AGENTS
+from benchmarks.fixture_site import FixtureSite
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_PROBE = (
+    "import sys, time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start); "
+    "print(','.join(m for m in ('numpy', 'pandas', 'sklearn', 'selenium.webdriver', 'torch', 'transformers') if m in sys.modules))"
+)
+# Fixture page each agent's task starts from; the ai agent has none
+FIXTURE_PAGES = {'manager': '/stations', 'system': '/charge-system', 'assistant': '/payment'}
+
+
+def import_time(module: str):
+    """
+    Import module in a fresh interpreter and return (seconds, heavy modules loaded).
+    """
+    output = subprocess.run([sys.executable, '-c', IMPORT_PROBE.format(module=module)],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stdout.split('\n')
+    return float(output[0]), output[1]
+
+
+def first_task_time(agent: str, pool: bool, site: FixtureSite) -> tuple:
+    """
+    Run one task through the CLI in a fresh interpreter and return
+    (wall time, None), or (wall time, last line of stderr) if it failed.
+    """
+    command = [sys.executable, 'chargecli.py', agent] + (['--pool'] if pool else [])
+    if agent in FIXTURE_PAGES:
+        command += ['--site-url', site.url(FIXTURE_PAGES[agent])]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if result.returncode:
+        lines = result.stderr.strip().splitlines()
+        return seconds, lines[-1] if lines else f"exit status {result.returncode}"
+    return seconds, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--first-task', action='store_true', help="Also time one end-to-end task per agent")
+    parser.add_argument('--pool', action='store_true', help="Run first tasks with a headless browser pool")
+    args = parser.parse_args()
+
+    site = FixtureSite(latency=0).start() if args.first_task else None
+    failures = {}
+    try:
+        print(f"{'agent':>10} {'import p50':>12} {'first task':>12}  heavy modules loaded by import")
+        for agent, (module, _, _) in AGENTS.items():
+            samples = [import_time(module) for _ in range(args.repeat)]
+            import_p50 = statistics.median(seconds for seconds, _ in samples)
+            first_task = f"{'-':>12}"
+            if site is not None:
+                seconds, error = first_task_time(agent, args.pool, site)
+                first_task = f"{seconds:>11.2f}s"
+                if error is not None:
+                    first_task, failures[agent] = f"{'failed':>12}", error
+            print(f"{agent:>10} {import_p50 * 1e3:>10.1f}ms {first_task}  {samples[0][1] or 'none'}")
+    finally:
+        if site is not None:
+            site.stop()
+    for agent, error in failures.items():
+        print(f"{agent} first task failed: {error}")
+
+
+if __name__ == '__main__':
+    main()
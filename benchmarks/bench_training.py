@@ -0,0 +1,64 @@
+"""
+Compare training time against interaction log size for a full refit (the
+original single-core RandomForestRegressor), a parallel full refit, and
+incremental warm-start updates with ForestUpdater. Run from the
+repository root:
+
+    python -m benchmarks.bench_training
+"""
+import argparse
+import time
+from typing import Tuple
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from chargeforests import ForestUpdater
+
+
+def generate_interactions(count: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generate features and outcomes shaped like ChargeSystem.execute_task interactions.
+    """
+    X = np.column_stack([
+        rng.uniform(1, 1000, count),  # payment_amount
+        rng.choice([0, 1, 2], count),  # payment_method
+        rng.choice([0, 1], count),  # payment_status
+    ])
+    y = rng.uniform(0, 1, count)  # outcome
+    return X, y
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 5_000, 20_000, 50_000])
+    parser.add_argument('--new-rows', type=int, default=500, help="Interactions logged between trainings")
+    parser.add_argument('--trees-per-update', type=int, default=10)
+    parser.add_argument('--max-trees', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    updater = ForestUpdater(trees_per_update=args.trees_per_update, max_trees=args.max_trees)
+    incremental_model = RandomForestRegressor()
+    X_all, y_all = np.empty((0, 3)), np.empty(0)
+
+    print(f"{'log size':>10} {'full 1-core':>12} {'full all':>12} {'incremental':>12} {'trees':>6}")
+    for size in args.sizes:
+        # Grow the log to the target size, updating incrementally along the way
+        # as a frequently retrained deployment would
+        while len(y_all) < size:
+            X_new, y_new = generate_interactions(min(args.new_rows, size - len(y_all)), rng)
+            X_all, y_all = np.vstack([X_all, X_new]), np.concatenate([y_all, y_new])
+            t_incremental = timed(lambda: updater.update(incremental_model, X_new, y_new))
+
+        t_full = timed(lambda: RandomForestRegressor().fit(X_all, y_all))
+        t_parallel = timed(lambda: RandomForestRegressor(n_jobs=-1).fit(X_all, y_all))
+        print(f"{size:>10} {t_full:>11.2f}s {t_parallel:>11.2f}s {t_incremental:>11.2f}s {len(incremental_model.estimators_):>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""
+A local stand-in for the charging station, payment system and payment
+sites the agents visit, served from generated pages so the agent flows can
+be benchmarked offline:
+
+    /stations        search form (#location, #time_needed, #search_stations)
+                     that fetches and renders .charge-station cards
+    /charge-system   #confirm-payment, #retry-payment and #cancel-payment
+    /payment         a "Pay Now" button among other buttons
+
+Page sizes and simulated server latency come from FixtureSite's settings.
+Run it on its own to browse the pages:
+
+    python -m benchmarks.fixture_site --port 8000
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+LOCATIONS = ['Tokyo', 'Osaka', 'Kyoto', 'Nagoya', 'Sapporo']
+# Rough city centres, so generated stations get plausible coordinates
+CITY_COORDS = {'Tokyo': (35.68, 139.76), 'Osaka': (34.69, 135.50), 'Kyoto': (35.01, 135.77),
+               'Nagoya': (35.18, 136.91), 'Sapporo': (43.06, 141.35)}
+
+STATIONS_PAGE = """<!DOCTYPE html>
+<html><head><title>Charging stations</title></head><body>
+<form onsubmit="return false;">
+  <input id="location" name="location">
+  <input id="time_needed" name="time_needed">
+  <button id="search_stations" type="button">Search</button>
+</form>
+<div id="results"></div>
+<script>
+document.getElementById('search_stations').addEventListener('click', function () {
+    var query = 'location=' + encodeURIComponent(document.getElementById('location').value);
+    fetch('/api/stations?' + query).then(function (response) { return response.json(); }).then(function (stations) {
+        var results = document.getElementById('results');
+        results.innerHTML = '';
+        stations.forEach(function (s) {
+            var card = document.createElement('div');
+            card.className = 'charge-station';
+            card.dataset.lat = s.latitude;
+            card.dataset.lon = s.longitude;
+            card.innerHTML = '<span class="price">$' + s.price.toFixed(2) + '</span> ' +
+                '<span class="charging-speed">' + s.charging_speed + ' kW</span> ' +
+                '<span class="available-time">' + s.available_time + '</span> ' +
+                '<span class="location">' + s.location + '</span> ' +
+                '<button class="select-station" type="button">Select</button>';
+            card.querySelector('.select-station').addEventListener('click', function () {
+                card.classList.add('selected');
+            });
+            results.appendChild(card);
+        });
+    });
+});
+</script>
+</body></html>
+"""
+
+CHARGE_SYSTEM_PAGE = """<!DOCTYPE html>
+<html><head><title>Charge system</title></head><body>
+<div id="status">Waiting</div>
+<button id="confirm-payment" type="button">Confirm Payment</button>
+<button id="retry-payment" type="button">Retry Transaction</button>
+<button id="cancel-payment" type="button">Cancel Transaction</button>
+<script>
+['confirm-payment', 'retry-payment', 'cancel-payment'].forEach(function (id) {
+    document.getElementById(id).addEventListener('click', function () {
+        fetch('/api/payment?action=' + id).then(function (response) { return response.json(); }).then(function (result) {
+            document.getElementById('status').textContent = result.status;
+        });
+    });
+});
+</script>
+</body></html>
+"""
+
+PAYMENT_PAGE = """<!DOCTYPE html>
+<html><head><title>Payment</title></head><body>
+<h1>Checkout</h1>
+<div id="buttons">{buttons}</div>
+<script>
+document.getElementById('pay-now').addEventListener('click', function () {{
+    document.body.appendChild(document.createTextNode('Paid'));
+}});
+</script>
+</body></html>
+"""
+
+
+class FixtureSite:
+    def __init__(self, stations: int = 50, buttons: int = 10, latency: float = 0.05, port: int = 0, seed: int = 0):
+        """
+        Serves the fixture pages on localhost. stations is the number of
+        .charge-station cards a search returns, buttons the number of
+        buttons on the payment page besides "Pay Now", and latency the
+        simulated server time for API calls in seconds. port 0 picks a
+        free port.
+        """
+        self.stations = stations
+        self.buttons = buttons
+        self.latency = latency
+        self.seed = seed
+        self.requests = 0
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                site._handle(self)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def start(self) -> 'FixtureSite':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='charge-fixture-site', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FixtureSite':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def generate_stations(self, location: str):
+        rng = np.random.default_rng(self.seed)
+        locations = rng.choice(LOCATIONS, self.stations)
+        if location in CITY_COORDS:
+            locations[:self.stations // 2] = location  # Half the results are in the searched city
+        stations = []
+        for name, price, speed, hour, offset in zip(locations, rng.uniform(1, 20, self.stations),
+                                                    rng.choice([22, 50, 100, 150, 350], self.stations),
+                                                    rng.integers(0, 24, self.stations),
+                                                    rng.normal(0, 0.05, (self.stations, 2))):
+            latitude, longitude = CITY_COORDS[name]
+            stations.append({'price': round(float(price), 2), 'charging_speed': int(speed),
+                             'available_time': f"{int(hour):02d}:00", 'location': str(name),
+                             'latitude': round(latitude + offset[0], 5), 'longitude': round(longitude + offset[1], 5)})
+        return stations
+
+    def payment_page(self) -> str:
+        buttons = [f'<button type="button" id="other-{i}">Option {i}</button>' for i in range(self.buttons)]
+        buttons.insert(len(buttons) // 2, '<button type="button" id="pay-now">Pay Now</button>')
+        return PAYMENT_PAGE.format(buttons='\n'.join(buttons))
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        url = urlparse(request.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        if url.path == '/stations':
+            self._send(request, STATIONS_PAGE)
+        elif url.path == '/charge-system':
+            self._send(request, CHARGE_SYSTEM_PAGE)
+        elif url.path == '/payment':
+            self._send(request, self.payment_page())
+        elif url.path == '/api/stations':
+            time.sleep(self.latency)
+            self._send(request, json.dumps(self.generate_stations(query.get('location', ''))), 'application/json')
+        elif url.path == '/api/payment':
+            time.sleep(self.latency)
+            self._send(request, json.dumps({'status': query.get('action', 'unknown')}), 'application/json')
+        else:
+            request.send_error(404)
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, body: str, content_type: str = 'text/html'):
+        data = body.encode()
+        request.send_response(200)
+        request.send_header('Content-Type', f"{content_type}; charset=utf-8")
+        request.send_header('Content-Length', str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--stations', type=int, default=50)
+    parser.add_argument('--buttons', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    site = FixtureSite(args.stations, args.buttons, args.latency, args.port).start()
+    print(f"Serving {site.url('/stations')}, {site.url('/charge-system')} and {site.url('/payment')}")
+    try:
+        site._thread.join()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
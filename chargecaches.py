@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+
+# Live WebDriver elements cannot outlive their page, and a card's position only holds
+# for the page it was parsed from, so neither is cached
+UNCACHED_FIELDS = ('select_button', 'index')
+
+
+def goal_key(goal: Dict[str, Any]) -> str:
+    """
+    Return the cache key for a task goal. Locations are compared case- and
+    whitespace-insensitively and time_needed numerically, so equivalent
+    goals share one entry.
+    """
+    location = re.sub(r'\s+', ' ', str(goal['location'])).strip().lower()
+    return json.dumps([location, float(goal['time_needed'])])
+
+
+class ListingCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0, stale_ttl: float = 300.0,
+                 directory: Optional[str] = None, disk_maxsize: int = 4096):
+        """
+        Cache of parsed station listings keyed by the normalized task goal.
+
+        A listing is fresh for ttl seconds. For stale_ttl seconds after that
+        it is still served, but a background refresh is started
+        (stale-while-revalidate); older listings are dropped. At most maxsize
+        listings are kept in memory, least recently used first out. With a
+        directory, every listing is also written there as JSON so the cache
+        survives restarts. Files of listings too old to serve are deleted
+        when found, on start-up and at most every ttl seconds, and only the
+        disk_maxsize newest are kept.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.directory = directory
+        self.disk_maxsize = disk_maxsize
+        self._pruned_at = None
+        self._entries = OrderedDict()  # key -> (stored at, stations)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'disk_hits': 0,
+                      'refreshes': 0, 'refresh_failures': 0, 'disk_pruned': 0}
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.prune_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key:
+            return None
+        return entry['stored_at'], entry['stations']
+
+    def _write_disk(self, key: str, stored_at: float, stations: List[Dict[str, Any]]):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': key, 'stored_at': stored_at, 'stations': stations}, f)
+        os.replace(tmp_path, path)
+
+    def _unlink(self, path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def prune_disk(self):
+        """
+        Delete listing files too old to serve, left-over temporary files and
+        all but the disk_maxsize newest listings.
+        """
+        self._pruned_at = time.time()
+        cutoff = self._pruned_at - (self.ttl + self.stale_ttl)
+        removed = 0
+        listings = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(('.json', '.tmp')):
+                    continue
+                try:
+                    modified = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue  # Deleted meanwhile
+                # A file is written when its listing is stored, so its age is the listing's
+                if modified < cutoff:
+                    removed += self._unlink(entry.path)
+                elif entry.name.endswith('.json'):
+                    listings.append((modified, entry.path))
+        listings.sort(reverse=True)
+        for _, path in listings[self.disk_maxsize:]:
+            removed += self._unlink(path)
+        with self._lock:
+            self.stats['disk_pruned'] += removed
+
+    def _lookup(self, key: str) -> Optional[tuple]:
+        """
+        Return (stored at, stations) from memory or disk, or None if missing
+        or too old to serve. Must be called with the lock held.
+        """
+        entry = self._entries.get(key)
+        if entry is None and self.directory is not None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self.stats['disk_hits'] += 1
+                self._store(key, entry)
+        if entry is not None and time.time() - entry[0] > self.ttl + self.stale_ttl:
+            self._entries.pop(key, None)
+            if self.directory is not None:
+                self.stats['disk_pruned'] += self._unlink(self._path(key))
+            entry = None
+        return entry
+
+    def _store(self, key: str, entry: tuple):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, goal: Dict[str, Any],
+            refresh: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the cached stations for goal, or None on a miss. If the
+        listing is stale and refresh is given, refresh() is run on a
+        background thread to replace it.
+        """
+        key = goal_key(goal)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            stale = time.time() - entry[0] > self.ttl
+            if stale:
+                self.stats['stale_hits'] += 1
+                if refresh is not None and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(goal, key, refresh),
+                                     name='charge-listing-refresh', daemon=True).start()
+            else:
+                self.stats['hits'] += 1
+        # Callers get their own copies so they cannot change the cached listing
+        return [dict(station) for station in entry[1]]
+
+    def _refresh(self, goal: Dict[str, Any], key: str, refresh: Callable[[], List[Dict[str, Any]]]):
+        outcome = 'refreshes'
+        try:
+            self.put(goal, refresh())
+        except Exception as e:
+            outcome = 'refresh_failures'
+            print(f"Refreshing station listing for {goal} failed: {e}")
+        finally:
+            with self._lock:
+                self.stats[outcome] += 1
+                self._refreshing.discard(key)
+
+    def put(self, goal: Dict[str, Any], stations: List[Dict[str, Any]]):
+        """
+        Store the stations listed for goal.
+        """
+        key = goal_key(goal)
+        stored_at = time.time()
+        stations = [{field: value for field, value in station.items() if field not in UNCACHED_FIELDS}
+                    for station in stations]
+        with self._lock:
+            self._store(key, (stored_at, stations))
+        if self.directory is not None:
+            self._write_disk(key, stored_at, stations)
+            if stored_at - self._pruned_at > self.ttl:
+                self.prune_disk()
+
+    def get_or_search(self, goal: Dict[str, Any], search: Callable[[], List[Dict[str, Any]]],
+                      refresh: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> List[Dict[str, Any]]:
+        """
+        Return the cached stations for goal, or run search() and cache its
+        result on a miss. Stale listings are refreshed with refresh()
+        (search() by default) in the background.
+        """
+        stations = self.get(goal, refresh=refresh or search)
+        if stations is None:
+            stations = search()
+            self.put(goal, stations)
+        return stations
+
+    def invalidate(self, goal: Dict[str, Any]):
+        """
+        Drop the listing for goal from memory and disk.
+        """
+        key = goal_key(goal)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.directory is not None:
+            self._unlink(self._path(key))
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counts, the hit rate (stale hits count as hits) and the cache size.
+        """
+        with self._lock:
+            hits = self.stats['hits'] + self.stats['stale_hits']
+            lookups = hits + self.stats['misses']
+            return dict(self.stats, entries=len(self._entries),
+                        hit_rate=hits / lookups if lookups else 0.0)
@@ -0,0 +1,119 @@
+"""
+Command line entry point for the Charge agents.
+
+    python chargecli.py manager "Find a charging station in Tokyo for 2 hours."
+    python chargecli.py system "Process a payment on the charge system"
+    python chargecli.py ai "Optimize trading strategy for Solana with front-running on the market"
+    python chargecli.py assistant "Find and proceed with payment on the page"
+
+Only the chosen agent's module is imported, and its heavy dependencies load
+when the agent first needs them.
+"""
+import argparse
+import importlib
+import time
+from typing import List, Dict, Any, Optional
+
+# Agent name -> (module, class, example task)
+AGENTS = {
+    'manager': ('chargedecides', 'ChargeManager', "Find a charging station in Tokyo for 2 hours."),
+    'system': ('chargelearns', 'ChargeSystem', "Process a payment on the charge system"),
+    'ai': ('chargellm', 'ChargeAI', "Optimize trading strategy for Solana with front-running on the market"),
+    'assistant': ('chargerecognizes', 'ChargeAssistant', "Find and proceed with payment on the page"),
+}
+# Agent name -> the attribute holding the page its task starts from
+SITE_ATTRIBUTES = {'manager': 'site_url', 'system': 'site_url', 'assistant': 'payment_url'}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run a Charge agent task.")
+    parser.add_argument('agent', choices=sorted(AGENTS), help="Which agent runs the task")
+    parser.add_argument('task', nargs='?', help="Task description (defaults to the agent's example task)")
+    parser.add_argument('--repeat', type=int, default=1, help="Run the task this many times")
+    parser.add_argument('--pool', action='store_true',
+                        help="Borrow headless browsers from a shared BrowserPool instead of starting Chrome per agent")
+    parser.add_argument('--timings', action='store_true', help="Print construction and per-task times")
+    parser.add_argument('--optimized', action='store_true',
+                        help="Use int8 quantized CPU inference for the ai and assistant agents")
+    parser.add_argument('--threads', type=int, help="Torch thread count for the optimized path")
+    parser.add_argument('--trace', metavar='PATH', help="Append per-stage spans and counters to PATH as JSON lines")
+    parser.add_argument('--metrics', metavar='PATH', help="Write per-stage metrics to PATH in Prometheus text format")
+    parser.add_argument('--site-url', metavar='URL',
+                        help="Page the task starts from (site_url for manager and system, payment_url for assistant)")
+
+    preferences = parser.add_argument_group("ChargeManager preferences")
+    preferences.add_argument('--max-price', type=float, default=10, help="Max price per hour")
+    preferences.add_argument('--min-speed', type=float, default=50, help="Minimum charging speed (kW)")
+    preferences.add_argument('--preferred-time', type=int, default=1200, help="Preferred time in military time")
+    preferences.add_argument('--preferred-location', default='Tokyo')
+    return parser
+
+
+def create_agent(name: str, args: argparse.Namespace, pool: Optional[Any] = None):
+    """
+    Import the agent's module and construct it.
+    """
+    module_name, class_name, _ = AGENTS[name]
+    agent_class = getattr(importlib.import_module(module_name), class_name)
+    agent = _construct(name, agent_class, args, pool)
+    if args.site_url and name in SITE_ATTRIBUTES:
+        setattr(agent, SITE_ATTRIBUTES[name], args.site_url)
+    return agent
+
+
+def _construct(name: str, agent_class: type, args: argparse.Namespace, pool: Optional[Any]):
+    if name == 'manager':
+        user_preferences: Dict[str, Any] = {
+            'max_price': args.max_price,
+            'min_speed': args.min_speed,
+            'preferred_time': args.preferred_time,
+            'preferred_location': args.preferred_location
+        }
+        return agent_class(user_preferences, pool=pool)
+    if name in ('ai', 'assistant'):
+        return agent_class(pool=pool, optimized=args.optimized, num_threads=args.threads)
+    return agent_class(pool=pool)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    task = args.task or AGENTS[args.agent][2]
+
+    tracer = None
+    if args.trace or args.metrics:
+        from chargetraces import Tracer, JsonLinesSink, PrometheusSink, set_tracer
+        sinks = []
+        if args.trace:
+            sinks.append(JsonLinesSink(args.trace))
+        if args.metrics:
+            sinks.append(PrometheusSink(args.metrics))
+        tracer = Tracer(sinks)
+        set_tracer(tracer)
+
+    pool = None
+    if args.pool:
+        from chargepools import get_default_pool
+        pool = get_default_pool()
+
+    start = time.perf_counter()
+    agent = create_agent(args.agent, args, pool)
+    if args.timings:
+        print(f"Constructed {type(agent).__name__} in {time.perf_counter() - start:.3f}s")
+
+    try:
+        for run in range(args.repeat):
+            start = time.perf_counter()
+            agent.execute_task(task)
+            if args.timings:
+                print(f"Task {run + 1} completed in {time.perf_counter() - start:.3f}s")
+    finally:
+        # Spans of a failed task are still written, and its pooled browsers still shut down
+        if tracer is not None:
+            tracer.close()
+        if pool is not None:
+            print(f"Browser pool: {pool.report()}")
+            pool.close()
+
+
+if __name__ == '__main__':
+    main()
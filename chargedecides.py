@@ -1,17 +1,49 @@
-import time
-from typing import List, Dict, Any
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import numpy as np
-
-class ChargeManager:
-    def __init__(self, user_preferences: Dict[str, Any]):
-        self.driver = webdriver.Chrome()
-        self.wait = WebDriverWait(self.driver, 10)
+from __future__ import annotations
+from typing import List, Dict, Any, Optional
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from chargelazy import lazy_import
+from chargecaches import ListingCache
+from chargepools import BrowserPool, DriverSessionMixin
+from chargetraces import TracedMixin
+from chargewaits import ElementCountStable, DomQuiescent
+
+# Heavy dependencies are imported on first use, so importing this module is cheap
+By = lazy_import('selenium.webdriver.common.by', 'By')
+EC = lazy_import('selenium.webdriver.support.expected_conditions')
+StationScorer = lazy_import('chargescores', 'StationScorer')
+
+# Returns one compact row per .charge-station card:
+# [index, price, charging speed, available time, location, select button, latitude, longitude].
+# innerText mirrors what WebElement.text reports for visible elements.
+# Coordinates come from the card's data-lat/data-lon attributes when present.
+STATION_EXTRACTION_SCRIPT = """
+return Array.from(document.getElementsByClassName('charge-station'), function (card, index) {
+    function text(name) {
+        var el = card.getElementsByClassName(name)[0];
+        return el ? el.innerText.trim() : null;
+    }
+    return [index, text('price'), text('charging-speed'), text('available-time'), text('location'),
+            card.getElementsByClassName('select-station')[0] || null,
+            card.dataset.lat || null, card.dataset.lon || null];
+});
+"""
+
+class ChargeManager(DriverSessionMixin, TracedMixin):
+    # Station search site; override per class or instance, e.g. to point at a test server
+    site_url = "example-charging-station-site.com"
+
+    def __init__(self, user_preferences: Dict[str, Any], pool: Optional[BrowserPool] = None,
+                 listing_cache: Optional[ListingCache] = None):
+        self._init_driver(pool)
         self.user_preferences = user_preferences
         self.task_goal = None
+        self.listing_cache = listing_cache
+        self.results_goal = None  # Goal whose search results the driver is showing
+
+    def _close_driver(self):
+        # The listed results go with the page
+        self.results_goal = None
+        super()._close_driver()
 
     def set_task_goal(self, goal: Dict[str, Any]):
         """
@@ -19,48 +51,37 @@ class ChargeManager:
         """
         self.task_goal = goal
 
-    def evaluate_charge_stations(self, stations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def evaluate_charge_stations(self, stations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """
         Evaluate charging stations based on user preferences and task goal.
         """
         if not self.task_goal or 'location' not in self.task_goal or 'time_needed' not in self.task_goal:
             raise ValueError("Task goal must include location and time_needed.")
 
-        # Simple scoring system based on preferences
-        def score_station(station):
-            score = 0
-            # Price
-            if self.user_preferences.get('max_price', float('inf')) > station['price']:
-                score += 1
-            else:
-                score -= 1  # Penalize if over budget
-            
-            # Charging Speed
-            if self.user_preferences.get('min_speed', 0) < station['charging_speed']:
-                score += 1
-            else:
-                score -= 1  # Penalize if speed is insufficient
-
-            # Availability Time
-            preferred_time = self.user_preferences.get('preferred_time', None)
-            if preferred_time:
-                time_diff = abs(station['available_time'] - preferred_time)
-                score -= time_diff / 3600  # Penalty for time difference in hours
+        # Score all stations in one batched pass, reading preferences once per call
+        return StationScorer(self.user_preferences).best(stations)
 
-            # Proximity
-            if self.user_preferences.get('preferred_location') == station['location']:
-                score += 1
-
-            return score
+    def top_charge_stations(self, stations: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """
+        Return the k best charging stations, best first.
+        """
+        if not self.task_goal or 'location' not in self.task_goal or 'time_needed' not in self.task_goal:
+            raise ValueError("Task goal must include location and time_needed.")
 
-        # Sort stations by score
-        scored_stations = sorted(stations, key=score_station, reverse=True)
-        return scored_stations[0] if scored_stations else None
+        return StationScorer(self.user_preferences).top_k(stations, k)
 
-    def parse_charge_stations(self) -> List[Dict[str, Any]]:
+    def parse_charge_stations(self, batched: bool = False) -> List[Dict[str, Any]]:
         """
         Parse charging stations from the current web page.
+
+        With batched=True every card is read in a single in-page script call
+        instead of four WebDriver round-trips per card. Batched records also
+        carry the card's 'index' and its 'select_button' element, so
+        select_charge_station can click without parsing the page again.
         """
+        if batched:
+            return self._parse_charge_stations_batched()
+
         # This is a simplified parsing. Real-world would involve more complex extraction methods.
         stations = []
         station_elements = self.driver.find_elements(By.CLASS_NAME, "charge-station")
@@ -78,54 +99,173 @@ class ChargeManager:
             })
         return stations
 
+    def _parse_charge_stations_batched(self) -> List[Dict[str, Any]]:
+        """
+        Read every station card with one execute_script call.
+        """
+        stations = []
+        rows = self.driver.execute_script(STATION_EXTRACTION_SCRIPT)
+        for index, price, charging_speed, available_time, location, select_button, latitude, longitude in rows:
+            if None in (price, charging_speed, available_time, location):
+                continue  # Skip cards that are missing a field
+            station = {
+                'price': float(price.replace('$', '')),
+                'charging_speed': int(charging_speed.split(' ')[0]),  # Assuming speed in kW
+                'available_time': int(available_time.replace(':', '')),
+                'location': location,
+                'index': index,
+                'select_button': select_button
+            }
+            if latitude is not None and longitude is not None:
+                station['latitude'] = float(latitude)
+                station['longitude'] = float(longitude)
+            stations.append(station)
+        return stations
+
     def select_charge_station(self, station: Dict[str, Any]):
         """
-        Select the charge station from the web page.
+        Select the charge station from the web page. A record without a
+        'select_button' (e.g. from the listing cache) is first matched to a
+        station on the live results page, searching again if they are not open.
         """
-        # Assuming the charge station list keeps the same order on the page as when parsed
-        station_index = next((index for index, s in enumerate(self.parse_charge_stations()) if s['price'] == station['price']), None)
-        if station_index is not None:
-            station_elements = self.driver.find_elements(By.CLASS_NAME, "charge-station")
+        if station.get('select_button') is None:
+            # Read the open results page for this goal again rather than trust a cached position
+            if self.results_goal == self.task_goal:
+                live_stations = self.parse_charge_stations(batched=True)
+            else:
+                live_stations = self.search_stations()
+            live_station = next((s for s in live_stations if all(
+                s[key] == station[key] for key in ('price', 'charging_speed', 'available_time', 'location'))), None)
+            if live_station is None:
+                print(f"Station is no longer listed: {station}")
+                return
+            station = live_station
+
+        # Records from a batched parse already hold the button to click
+        select_button = station.get('select_button')
+        if select_button is not None:
+            try:
+                select_button.click()
+                return
+            except StaleElementReferenceException:
+                pass  # The page re-rendered since parsing; fall back to the card index
+
+        if 'index' in station:
+            station_index = station['index']
+        else:
+            # Assuming the charge station list keeps the same order on the page as when parsed
+            station_index = next((index for index, s in enumerate(self.parse_charge_stations()) if s['price'] == station['price']), None)
+        if station_index is None:
+            print(f"Station is no longer listed: {station}")
+            return
+        # The list may have shrunk or changed since parsing
+        station_elements = self.driver.find_elements(By.CLASS_NAME, "charge-station")
+        if station_index >= len(station_elements):
+            print(f"Station is no longer listed: {station}")
+            return
+        try:
             station_elements[station_index].find_element(By.CLASS_NAME, "select-station").click()
+        except NoSuchElementException:
+            print(f"Station is no longer listed: {station}")
 
-    def execute_task(self, task_description: str):
+    def search_stations(self, goal: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
-        Execute the task of finding a charging station based on user preferences and task goal.
+        Search the station site for a goal (the current task goal by default)
+        and return the parsed stations. The driver stays open so a station
+        can be selected afterwards; call _close_driver when done.
         """
-        self.set_task_goal({'location': 'Tokyo', 'time_needed': 2})  # Example task goal
+        if goal is not None:
+            self.set_task_goal(goal)
+        if not self.task_goal or 'location' not in self.task_goal or 'time_needed' not in self.task_goal:
+            raise ValueError("Task goal must include location and time_needed.")
+        trace = self.trace
+        with trace.span('ChargeManager.browser'):
+            self._open_driver()
         
         # Navigate to charging station website
-        self.driver.get("example-charging-station-site.com")
+        with trace.span('ChargeManager.navigate'):
+            self.driver.get(self.site_url)
         
         # Fill out search parameters
-        self.wait.until(EC.element_to_be_clickable((By.ID, "location"))).send_keys(self.task_goal['location'])
-        self.wait.until(EC.element_to_be_clickable((By.ID, "time_needed"))).send_keys(str(self.task_goal['time_needed']))
-        self.wait.until(EC.element_to_be_clickable((By.ID, "search_stations"))).click()
+        with trace.span('ChargeManager.search_form'):
+            self.wait.until(EC.element_to_be_clickable((By.ID, "location"))).send_keys(self.task_goal['location'])
+            self.wait.until(EC.element_to_be_clickable((By.ID, "time_needed"))).send_keys(str(self.task_goal['time_needed']))
+            self.wait.until(EC.element_to_be_clickable((By.ID, "search_stations"))).click()
         
-        # Wait for station options to load
-        time.sleep(5)  # Wait for page to load stations (replace with proper wait condition)
-        
-        # Parse and evaluate station options
-        stations = self.parse_charge_stations()
-        best_station = self.evaluate_charge_stations(stations)
-        
-        if best_station:
-            print(f"Best charging station selected: {best_station}")
-            self.select_charge_station(best_station)
-            # Here you would proceed to book the charging slot, fill in vehicle details, etc.
-        else:
-            print("No suitable charging stations found.")
+        # Wait for station options to load: the card count has settled and the DOM is quiet.
+        # Give up after the 5 seconds the old fixed sleep used and parse whatever is there.
+        with trace.span('ChargeManager.wait') as span:
+            stations_loaded = ElementCountStable((By.CLASS_NAME, "charge-station")) & DomQuiescent()
+            span.set(satisfied=self.waiter.until(stations_loaded, timeout=5, raise_on_timeout=False))
+        with trace.span('ChargeManager.parse') as span:
+            stations = self.parse_charge_stations(batched=True)
+            span.set(stations=len(stations))
+        trace.count('stations_parsed', len(stations), agent='ChargeManager')
+        self.results_goal = dict(self.task_goal)
+        return stations
+
+    def find_stations(self, goal: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Like search_stations, but served from the listing cache when one is
+        set, for listing reads such as the fan-out. Cached listings are
+        returned without touching the browser and their records carry no
+        'select_button' or 'index'; select_charge_station matches one to the
+        live results page (searching again if needed), so tasks that select
+        a station use search_stations.
+        """
+        if goal is not None:
+            self.set_task_goal(goal)
+        if self.listing_cache is None:
+            return self.search_stations()
+        goal = dict(self.task_goal)
+        return self.listing_cache.get_or_search(goal, self.search_stations,
+                                                refresh=lambda: self._search_detached(goal))
+
+    def _search_detached(self, goal: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Search with a separate manager (and browser), for background refreshes.
+        """
+        manager = ChargeManager(self.user_preferences, pool=self.pool)
+        manager.site_url = self.site_url
+        try:
+            return manager.search_stations(goal)
+        finally:
+            manager._close_driver()
+
+    def execute_task(self, task_description: str):
+        """
+        Execute the task of finding a charging station based on user preferences and task goal.
+        """
+        trace = self.trace
+        with trace.span('ChargeManager.execute_task'), self.driver_session():
+            # Parse and evaluate station options. Selecting needs the live results page, so the task
+            # always searches; the listing is written to the cache for fan-out and other listing reads.
+            goal = {'location': 'Tokyo', 'time_needed': 2}  # Example task goal
+            stations = self.search_stations(goal)
+            if self.listing_cache is not None:
+                self.listing_cache.put(goal, stations)
+            with trace.span('ChargeManager.score', stations=len(stations)):
+                best_station = self.evaluate_charge_stations(stations)
+            
+            if best_station:
+                print(f"Best charging station selected: {best_station}")
+                with trace.span('ChargeManager.select'):
+                    self.select_charge_station(best_station)
+                # Here you would proceed to book the charging slot, fill in vehicle details, etc.
+            else:
+                trace.count('no_station_found', agent='ChargeManager')
+                print("No suitable charging stations found.")
 
-        print("Task execution completed.")
-        self.driver.quit()
+            print("Task execution completed.")
 
-# Example usage
-user_preferences = {
-    'max_price': 10,  # Max price per hour
-    'min_speed': 50,  # Minimum charging speed (kW)
-    'preferred_time': 1200,  # 12:00 PM in military time
-    'preferred_location': 'Tokyo'
-}
+# Example usage (see chargecli.py for the command line entry point)
+if __name__ == "__main__":
+    user_preferences = {
+        'max_price': 10,  # Max price per hour
+        'min_speed': 50,  # Minimum charging speed (kW)
+        'preferred_time': 1200,  # 12:00 PM in military time
+        'preferred_location': 'Tokyo'
+    }
 
-charge_manager = ChargeManager(user_preferences)
-charge_manager.execute_task("Find a charging station in Tokyo for 2 hours.")
+    charge_manager = ChargeManager(user_preferences)
+    charge_manager.execute_task("Find a charging station in Tokyo for 2 hours.")
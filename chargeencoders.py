@@ -0,0 +1,163 @@
+import copy
+import re
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Hashable
+import torch
+from transformers import AutoModel, AutoTokenizer
+from chargepredicts import MicroBatcher
+
+
+def optimize_for_cpu(model: torch.nn.Module, num_threads: Optional[int] = None) -> torch.nn.Module:
+    """
+    Return an int8 copy of model for CPU inference: every nn.Linear is
+    dynamically quantized (int8 weights, activations quantized per call).
+    num_threads sets torch's intra-op thread count, which is process-wide.
+    """
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    model.eval()
+    with warnings.catch_warnings():
+        # Newer torch releases warn that torch.ao.quantization is deprecated; it still works
+        warnings.simplefilter('ignore')
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize an instruction for cache lookups: lowercase, trimmed, single spaces.
+    """
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class IntentCache:
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300.0):
+        """
+        Thread-safe LRU cache of parsed intent results. Entries expire ttl
+        seconds after they were stored (never, if ttl is None).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (stored at, value)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                entry = None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TextEncoder:
+    def __init__(self, model_name: str = "bert-base-uncased", max_batch: int = 32, max_delay: float = 0.005,
+                 cache_size: int = 1024, cache_ttl: Optional[float] = 300.0, optimized: bool = False,
+                 max_length: Optional[int] = None, num_threads: Optional[int] = None):
+        """
+        One tokenizer/model pair shared by every agent in the process.
+
+        Weights load on first use. Concurrent encode requests are batched
+        together (padded to the longest text in the batch) and run under
+        torch.inference_mode. Parsed intents are cached by normalized text,
+        so repeated instructions skip the forward pass entirely.
+
+        optimized=True serves an int8 dynamically quantized copy of the
+        model (see optimize_for_cpu) and truncates inputs to max_length
+        tokens, 128 unless given; instructions are short, so this mostly
+        bounds the worst case.
+        """
+        self.model_name = model_name
+        self.optimized = optimized
+        self.max_length = max_length if max_length is not None else (128 if optimized else None)
+        self.num_threads = num_threads
+        self.cache = IntentCache(cache_size, cache_ttl)
+        self.tokenizer = None
+        self.model = None
+        self._load_lock = threading.Lock()
+        self._batcher = MicroBatcher(self.encode, max_batch, max_delay)
+
+    def _load(self):
+        with self._load_lock:
+            if self.model is None:
+                self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModel.from_pretrained(self.model_name)
+                model.eval()
+                if self.optimized:
+                    model = optimize_for_cpu(model, self.num_threads)
+                elif self.num_threads is not None:
+                    torch.set_num_threads(self.num_threads)
+                self.model = model
+
+    def encode(self, texts: List[str]) -> List[torch.Tensor]:
+        """
+        Encode texts in one forward pass and return one [CLS] embedding per text.
+        """
+        if self.model is None:
+            self._load()
+        # Duplicates within a batch are encoded once
+        unique = list(dict.fromkeys(texts))
+        inputs = self.tokenizer(unique, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt")
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+        embeddings = dict(zip(unique, outputs.last_hidden_state[:, 0]))
+        return [embeddings[text] for text in texts]
+
+    def encode_one(self, text: str) -> torch.Tensor:
+        """
+        Encode a single text, sharing a forward pass with concurrent callers.
+        """
+        return self._batcher(text)
+
+    def understand(self, text: str, interpret: Callable[[torch.Tensor], Dict[str, Any]],
+                   namespace: str = 'default') -> Dict[str, Any]:
+        """
+        Return interpret(embedding) for text, served from the intent cache
+        when the same normalized text was parsed recently. namespace keeps
+        different agents' interpretations apart.
+        """
+        normalized = normalize_text(text)
+        key = (namespace, normalized)
+        result = self.cache.get(key)
+        if result is None:
+            result = interpret(self.encode_one(normalized))
+            self.cache.put(key, result)
+        # Callers get their own copy so they cannot change the cached result
+        return copy.deepcopy(result)
+
+
+_shared_encoders = {}
+_shared_encoders_lock = threading.Lock()
+
+
+def get_shared_encoder(model_name: str = "bert-base-uncased", optimized: bool = False, **kwargs) -> TextEncoder:
+    """
+    Return the process-wide encoder for model_name (one fp32 and one
+    optimized encoder at most), creating it on first use. Other keyword
+    arguments only apply when the encoder is created.
+    """
+    with _shared_encoders_lock:
+        key = (model_name, optimized)
+        encoder = _shared_encoders.get(key)
+        if encoder is None:
+            encoder = _shared_encoders[key] = TextEncoder(model_name, optimized=optimized, **kwargs)
+        return encoder
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+import numpy as np
+from chargecaches import ListingCache
+from chargepools import BrowserPool
+from chargedecides import ChargeManager
+from chargescores import StationScorer
+
+
+class StationSearchFanOut:
+    def __init__(self, user_preferences: Dict[str, Any], max_workers: int = 4, pool: Optional[BrowserPool] = None,
+                 listing_cache: Optional[ListingCache] = None):
+        """
+        Runs station searches for many goals at once and merges the results.
+
+        Each goal ({'location': ..., 'time_needed': ...}) is searched by its
+        own ChargeManager on a worker thread. The threads mostly wait on
+        their browsers, so threads are enough to overlap the searches; the
+        number of browsers is bounded by the BrowserPool (one with
+        max_workers sessions is created if none is given). A batch takes
+        about as long as its slowest search. Goals found in listing_cache
+        skip the browser.
+        """
+        self.user_preferences = user_preferences
+        self.max_workers = max_workers
+        self._owns_pool = pool is None
+        self.pool = pool if pool is not None else BrowserPool(max_sessions=max_workers)
+        self.scorer = StationScorer(user_preferences)
+        self.listing_cache = listing_cache
+
+    def _search_goal(self, goal: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Search and score one goal. Errors are recorded in the result instead
+        of being raised, so one failing search does not affect the others.
+        """
+        start = time.perf_counter()
+        manager = ChargeManager(self.user_preferences, pool=self.pool, listing_cache=self.listing_cache)
+        result = {'goal': goal, 'stations': [], 'scores': np.empty(0), 'error': None}
+        try:
+            stations = manager.find_stations(goal)
+            # Element handles belong to a browser that goes back to the pool
+            stations = [{key: value for key, value in station.items() if key != 'select_button'}
+                        for station in stations]
+            scores = self.scorer.score(stations)
+            # Set together, so a goal that fails while scoring contributes no unscored stations
+            result['stations'], result['scores'] = stations, scores
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            manager._close_driver()
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    def search(self, goals: List[Dict[str, Any]], top_k: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Search every goal concurrently and return:
+
+            ranking  the best top_k stations over all goals (all of them by
+                     default), best first, each with its 'goal' and 'score'
+            goals    one entry per goal, in order, with its station count,
+                     'seconds' and 'error' (None if it succeeded)
+            seconds  wall-clock time for the whole batch
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='charge-fanout') as executor:
+            results = list(executor.map(self._search_goal, goals))
+
+        # Every goal is scored with the same preferences, so the scores rank globally
+        stations = [dict(station, goal=result['goal']) for result in results for station in result['stations']]
+        scores = np.concatenate([result['scores'] for result in results]) if results else np.empty(0)
+        k = len(stations) if top_k is None else top_k
+        ranking = [dict(stations[i], score=float(scores[i])) for i in self.scorer.top_k_indices(scores, k)]
+
+        return {
+            'ranking': ranking,
+            'goals': [{'goal': result['goal'], 'stations': len(result['stations']),
+                       'seconds': result['seconds'], 'error': result['error']} for result in results],
+            'seconds': time.perf_counter() - start
+        }
+
+    def close(self):
+        """
+        Close the browser pool if this fan-out created it.
+        """
+        if self._owns_pool:
+            self.pool.close()
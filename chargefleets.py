@@ -0,0 +1,163 @@
+import time
+from typing import List, Dict, Any, Optional
+import numpy as np
+from chargelazy import lazy_import
+from chargescores import DEFAULT_PROXIMITY_RADIUS_KM, stations_to_columns
+from chargegeo import haversine_km
+
+# SciPy comes with scikit-learn; it is only imported when a fleet is planned
+linear_sum_assignment = lazy_import('scipy.optimize', 'linear_sum_assignment')
+
+
+def preferences_to_columns(vehicles: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert per-vehicle user preferences into columnar NumPy arrays. Missing
+    preferences get the values under which score_station ignores them:
+    no price limit, no minimum speed, NaN for no preferred time or
+    coordinates, None for no preferred location.
+    """
+    count = len(vehicles)
+    preferred_time = (v.get('preferred_time') or np.nan for v in vehicles)
+    coords = [v.get('preferred_coords') or (np.nan, np.nan) for v in vehicles]
+    return {
+        'max_price': np.fromiter((v.get('max_price', np.inf) for v in vehicles), dtype=np.float64, count=count),
+        'min_speed': np.fromiter((v.get('min_speed', 0) for v in vehicles), dtype=np.float64, count=count),
+        'preferred_time': np.fromiter(preferred_time, dtype=np.float64, count=count),
+        'preferred_location': [v.get('preferred_location') for v in vehicles],
+        'latitude': np.fromiter((c[0] for c in coords), dtype=np.float64, count=count),
+        'longitude': np.fromiter((c[1] for c in coords), dtype=np.float64, count=count),
+        'proximity_radius_km': np.fromiter((v.get('proximity_radius_km', DEFAULT_PROXIMITY_RADIUS_KM)
+                                            for v in vehicles), dtype=np.float64, count=count),
+    }
+
+
+class FleetPlanner:
+    def __init__(self, slots: int = 1, slot_length: float = 3600, capacity: int = 1,
+                 min_score: Optional[float] = None):
+        """
+        Assigns a fleet of vehicles to charging stations in one optimal batch.
+
+        Each vehicle is described by its own user preferences (the same keys
+        StationScorer reads) and is scored against every station slot with
+        the score_station rules. A station offers its 'capacity' chargers
+        (capacity if the station has none) for its 'slots' consecutive slots
+        (slots if it has none), each slot_length long in available_time
+        units, the first one starting at its available_time; the time
+        penalty is taken at the slot's start. A vehicle takes one slot on
+        one charger. The assignment maximizing the fleet's total score is
+        solved exactly with scipy's linear_sum_assignment, so no charger
+        slot is given out twice. With min_score, a vehicle is only assigned
+        a slot scoring above it; vehicles are also left unassigned when
+        there are more vehicles than slots. Solving is quickest when slots
+        are plentiful and slows down as the fleet approaches the number of
+        charger slots.
+        """
+        self.slots = slots
+        self.slot_length = slot_length
+        self.capacity = capacity
+        self.min_score = min_score
+
+    def slot_columns(self, stations: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        One entry per bookable charger slot: its station index, slot number
+        and start time.
+        """
+        count = len(stations)
+        slots = np.fromiter((s.get('slots', self.slots) for s in stations), dtype=np.int64, count=count)
+        capacity = np.fromiter((s.get('capacity', self.capacity) for s in stations), dtype=np.int64, count=count)
+        available_time = np.fromiter((s['available_time'] for s in stations), dtype=np.float64, count=count)
+        # Slot numbers 0..slots-1 for each station, then one copy per charger
+        station = np.repeat(np.arange(count), slots)
+        slot = np.arange(len(station)) - np.repeat(np.cumsum(slots) - slots, slots)
+        chargers = capacity[station]
+        station, slot = np.repeat(station, chargers), np.repeat(slot, chargers)
+        return {'station': station, 'slot': slot, 'start_time': available_time[station] + slot * self.slot_length}
+
+    def station_scores(self, vehicles: Dict[str, np.ndarray], stations: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Score every vehicle against every station in one pass, leaving out
+        the time penalty (it depends on the slot). Returns a
+        (vehicles, stations) array.
+        """
+        # Price and charging speed: +1 if acceptable, -1 otherwise
+        scores = np.where(vehicles['max_price'][:, None] > stations['price'][None, :], 1.0, -1.0)
+        scores += np.where(vehicles['min_speed'][:, None] < stations['charging_speed'][None, :], 1.0, -1.0)
+
+        # Proximity: compare location names as integer codes rather than strings
+        codes = {name: code for code, name in enumerate(dict.fromkeys(stations['location'].tolist()))}
+        station_codes = np.fromiter((codes[name] for name in stations['location']), dtype=np.int64,
+                                    count=len(stations['location']))
+        vehicle_codes = np.fromiter((codes.get(name, -1) for name in vehicles['preferred_location']),
+                                    dtype=np.int64, count=len(vehicles['preferred_location']))
+        same_location = vehicle_codes[:, None] == station_codes[None, :]
+        located = ~np.isnan(vehicles['latitude'])
+        if located.any() and not np.isnan(stations['latitude']).all():
+            distances = haversine_km(vehicles['latitude'][:, None], vehicles['longitude'][:, None],
+                                     stations['latitude'][None, :], stations['longitude'][None, :])
+            # Vehicles without preferred_coords and stations without coordinates use the location name
+            scores += np.where(np.isnan(distances), same_location,
+                               np.maximum(0.0, 1 - distances / vehicles['proximity_radius_km'][:, None]))
+        else:
+            scores += same_location
+        return scores
+
+    def score_matrix(self, vehicles: List[Dict[str, Any]], stations: List[Dict[str, Any]],
+                     columns: Optional[Dict[str, np.ndarray]] = None) -> np.ndarray:
+        """
+        Return the (vehicles, charger slots) score matrix; columns are
+        slot_columns(stations) unless given.
+        """
+        if columns is None:
+            columns = self.slot_columns(stations)
+        vehicle_columns = preferences_to_columns(vehicles)
+        station_scores = self.station_scores(vehicle_columns, stations_to_columns(stations))
+        scores = station_scores[:, columns['station']]
+        # Penalty for the time difference in hours, for vehicles with a preferred time
+        preferred_time = vehicle_columns['preferred_time']
+        penalty = np.subtract(columns['start_time'][None, :], preferred_time[:, None])
+        np.abs(penalty, out=penalty)
+        penalty /= 3600
+        penalty[np.isnan(preferred_time)] = 0.0
+        scores -= penalty
+        return scores
+
+    def plan(self, vehicles: List[Dict[str, Any]], stations: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Assign vehicles to charger slots. Returns 'assignments' (per vehicle,
+        in order: a dict with the 'station', its 'station_index', the
+        'slot', its 'start_time' and the 'score', or None if unassigned),
+        the fleet's 'total_score' and the 'seconds' taken.
+        """
+        start = time.perf_counter()
+        assignments = [None] * len(vehicles)
+        columns = self.slot_columns(stations) if stations else None
+        if not vehicles or columns is None or not len(columns['station']):
+            return {'assignments': assignments, 'total_score': 0.0, 'seconds': time.perf_counter() - start}
+
+        scores = self.score_matrix(vehicles, stations, columns)
+        candidates = np.arange(scores.shape[1])
+        count = len(vehicles)
+        if scores.shape[1] > 2 * count:
+            # Others can take at most count - 1 slots, so some optimal assignment gives every
+            # vehicle one of its count best slots; only those slots need to go to the solver
+            candidates = np.unique(np.argpartition(-scores, count - 1, axis=1)[:, :count])
+            scores = scores[:, candidates]
+        if self.min_score is None:
+            rows, assigned = linear_sum_assignment(scores, maximize=True)
+        else:
+            # A slot scoring min_score or less is worth no more than no slot, so those scores
+            # are clipped to 0 and their assignments dropped; this needs no "unassigned" columns
+            rows, assigned = linear_sum_assignment(np.maximum(scores - self.min_score, 0.0), maximize=True)
+
+        total_score = 0.0
+        for row, candidate in zip(rows.tolist(), assigned.tolist()):
+            column = int(candidates[candidate])
+            score = float(scores[row, candidate])
+            if self.min_score is not None and score <= self.min_score:
+                continue
+            station_index = int(columns['station'][column])
+            assignments[row] = {'station': stations[station_index], 'station_index': station_index,
+                                'slot': int(columns['slot'][column]),
+                                'start_time': float(columns['start_time'][column]), 'score': score}
+            total_score += score
+        return {'assignments': assignments, 'total_score': total_score, 'seconds': time.perf_counter() - start}
@@ -0,0 +1,59 @@
+import time
+from typing import Optional
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+
+class ForestUpdater:
+    def __init__(self, trees_per_update: int = 10, max_trees: Optional[int] = None,
+                 max_tree_age: Optional[float] = None, n_jobs: int = -1, full_trees: int = 100):
+        """
+        Grows a random forest incrementally with warm_start.
+
+        Each update fits trees_per_update new trees on the new interactions
+        only and keeps the existing trees. After an update, the oldest trees
+        are dropped so that at most max_trees remain and none is older than
+        max_tree_age seconds. n_jobs is passed to scikit-learn to fit trees in
+        parallel (-1 uses every core). A full refit starts over with
+        full_trees trees, however many updates and pruning left.
+        """
+        self.trees_per_update = trees_per_update
+        self.max_trees = max_trees
+        self.max_tree_age = max_tree_age
+        self.n_jobs = n_jobs
+        self.full_trees = full_trees
+
+    def update(self, model: RandomForestRegressor, X: np.ndarray, y: np.ndarray) -> RandomForestRegressor:
+        """
+        Add trees_per_update trees fitted on X, y to model, then prune.
+        """
+        existing = len(getattr(model, 'estimators_', []))
+        model.set_params(warm_start=True, n_jobs=self.n_jobs, n_estimators=existing + self.trees_per_update)
+        model.fit(X, y)
+
+        # Fit times per tree, kept on the model so they survive save/load.
+        # Trees from a full refit carry no times and count as fitted now.
+        now = time.time()
+        tree_times = list(getattr(model, 'charge_tree_times_', []))[-existing:] if existing else []
+        tree_times = [now] * (existing - len(tree_times)) + tree_times
+        model.charge_tree_times_ = tree_times + [now] * self.trees_per_update
+        self.prune(model, now)
+        return model
+
+    def prune(self, model: RandomForestRegressor, now: Optional[float] = None):
+        """
+        Drop the oldest trees beyond max_trees or older than max_tree_age.
+        The trees from the latest update are always kept.
+        """
+        tree_times = model.charge_tree_times_
+        keep_from = 0
+        if self.max_trees is not None:
+            keep_from = max(keep_from, len(tree_times) - self.max_trees)
+        if self.max_tree_age is not None:
+            cutoff = (time.time() if now is None else now) - self.max_tree_age
+            keep_from = max(keep_from, int(np.searchsorted(tree_times, cutoff, side='left')))
+        keep_from = min(keep_from, len(tree_times) - self.trees_per_update)
+        if keep_from > 0:
+            model.estimators_ = model.estimators_[keep_from:]
+            model.charge_tree_times_ = tree_times[keep_from:]
+            model.n_estimators = len(model.estimators_)
@@ -0,0 +1,251 @@
+import hashlib
+from collections import defaultdict, deque
+from typing import List, Dict, Any, Callable, Tuple
+import numpy as np
+from PIL import Image
+
+# (left, top, right, bottom) in pixels, the same layout as an element's 'bounds'
+Box = Tuple[int, int, int, int]
+
+
+def tile_hashes(image: Image.Image, tile_size: int = 64) -> np.ndarray:
+    """
+    Return a (rows, columns) array with one 64-bit digest per tile_size
+    square of the image. Any pixel change changes its tile's digest.
+    """
+    pixels = np.asarray(image)
+    height, width = pixels.shape[:2]
+    rows, columns = -(-height // tile_size), -(-width // tile_size)
+    hashes = np.empty((rows, columns), dtype=np.uint64)
+    for row in range(rows):
+        band = pixels[row * tile_size:(row + 1) * tile_size]
+        for column in range(columns):
+            tile = np.ascontiguousarray(band[:, column * tile_size:(column + 1) * tile_size])
+            hashes[row, column] = int.from_bytes(hashlib.blake2b(tile, digest_size=8).digest(), 'little')
+    return hashes
+
+
+def changed_regions(changed: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """
+    Group changed tiles into 4-connected regions and return the bounding
+    box of each, in tile units, as (left, top, right, bottom) with exclusive
+    right and bottom.
+    """
+    seen = np.zeros_like(changed, dtype=bool)
+    rows, columns = changed.shape
+    regions = []
+    for start in zip(*map(np.ndarray.tolist, np.nonzero(changed))):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = deque([start])
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        while queue:
+            row, column = queue.popleft()
+            top, bottom = min(top, row), max(bottom, row)
+            left, right = min(left, column), max(right, column)
+            for neighbour in ((row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1)):
+                if 0 <= neighbour[0] < rows and 0 <= neighbour[1] < columns \
+                        and changed[neighbour] and not seen[neighbour]:
+                    seen[neighbour] = True
+                    queue.append(neighbour)
+        regions.append((left, top, right + 1, bottom + 1))
+    return regions
+
+
+def _overlaps(bounds: List[float], box: Box) -> bool:
+    return bounds[0] < box[2] and box[0] < bounds[2] and bounds[1] < box[3] and box[1] < bounds[3]
+
+
+def _touches(a: Box, b: Box) -> bool:
+    """
+    Whether two boxes overlap or share an edge.
+    """
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def merge_boxes(boxes: List[Box]) -> List[Box]:
+    """
+    Merge overlapping or adjacent boxes into their bounding boxes until no
+    two of the returned boxes touch.
+    """
+    merged = list(boxes)
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for i, other in enumerate(result):
+                if _touches(box, other):
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]))
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
+
+
+def _iou(a: List[float], b: List[float]) -> float:
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def diff_elements(previous_elements: List[Dict[str, Any]], new_elements: List[Dict[str, Any]],
+                  min_iou: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    Match elements between two frames by identity and return the changes.
+
+    Elements match when they have the same type and text and their bounds
+    overlap by at least min_iou. Each change is {'old': ..., 'new': ...};
+    old is None for an inserted element and new is None for a removed one.
+    Matched elements are reported only if they differ (e.g. they moved).
+    Candidates are bucketed by (type, text), so the diff is linear in the
+    number of elements unless many share a key.
+    """
+    exact = {}
+    buckets = defaultdict(list)
+    for index, element in enumerate(previous_elements):
+        key = (element.get('type'), element.get('text'))
+        exact.setdefault(key + (tuple(element.get('bounds', ())),), []).append(index)
+        buckets[key].append(index)
+
+    matched = [False] * len(previous_elements)
+    changes = []
+    for element in new_elements:
+        key = (element.get('type'), element.get('text'))
+        # Unchanged elements are found by their exact bounds first
+        match = next((i for i in exact.get(key + (tuple(element.get('bounds', ())),), []) if not matched[i]), None)
+        if match is None and 'bounds' in element:
+            best_iou = min_iou
+            for i in buckets.get(key, []):
+                if not matched[i] and 'bounds' in previous_elements[i]:
+                    iou = _iou(previous_elements[i]['bounds'], element['bounds'])
+                    if iou >= best_iou:
+                        match, best_iou = i, iou
+        if match is None:
+            changes.append({'old': None, 'new': element})
+            continue
+        matched[match] = True
+        if previous_elements[match] != element:
+            changes.append({'old': previous_elements[match], 'new': element})
+
+    changes.extend({'old': element, 'new': None}
+                   for element, was_matched in zip(previous_elements, matched) if not was_matched)
+    return changes
+
+
+class IncrementalRecognizer:
+    def __init__(self, recognize: Callable[[List[Image.Image]], List[List[Dict[str, Any]]]],
+                 tile_size: int = 64, full_frame_ratio: float = 0.5, min_iou: float = 0.5):
+        """
+        Recognizes UI elements in a stream of frames, running the CV model
+        only where the frame changed.
+
+        recognize takes a batch of images and returns one element list per
+        image, with bounds relative to that image. Each frame is split into
+        tile_size tiles and hashed. If no tile changed, the previous
+        elements are returned without calling recognize. Otherwise the
+        changed tiles are grouped into regions, each grown to cover the
+        elements it cuts through, and overlapping or adjacent regions are
+        merged, so no element is recognized in two crops. Elements
+        overlapping a region are dropped, and only the region crops are
+        recognized (in one batch) and merged back; an element matching one
+        already found (same type and text, bounds overlapping by at least
+        min_iou) is kept once. When more than full_frame_ratio of the tiles
+        changed, or the frame size changed, the whole frame is recognized
+        instead.
+        """
+        self.recognize = recognize
+        self.tile_size = tile_size
+        self.full_frame_ratio = full_frame_ratio
+        self.min_iou = min_iou
+        self.stats = {'frames': 0, 'skipped': 0, 'partial': 0, 'full': 0, 'regions': 0}
+        self.reset()
+
+    def reset(self):
+        """
+        Forget the previous frame, so the next one is recognized in full.
+        """
+        self._size = None
+        self._hashes = None
+        self.elements = []
+
+    def update(self, image: Image.Image) -> List[Dict[str, Any]]:
+        """
+        Recognize the next frame and return its elements.
+        """
+        image = image.convert('RGB')
+        hashes = tile_hashes(image, self.tile_size)
+        self.stats['frames'] += 1
+
+        if self._hashes is None or image.size != self._size:
+            elements = self._recognize_full(image)
+        else:
+            changed = hashes != self._hashes
+            if not changed.any():
+                self.stats['skipped'] += 1
+                elements = self.elements
+            elif changed.mean() > self.full_frame_ratio:
+                elements = self._recognize_full(image)
+            else:
+                elements = self._recognize_regions(image, changed)
+
+        self._size = image.size
+        self._hashes = hashes
+        self.elements = elements
+        return list(elements)
+
+    def _recognize_full(self, image: Image.Image) -> List[Dict[str, Any]]:
+        self.stats['full'] += 1
+        return self.recognize([image])[0]
+
+    def _recognize_regions(self, image: Image.Image, changed: np.ndarray) -> List[Dict[str, Any]]:
+        self.stats['partial'] += 1
+        width, height = image.size
+        boxes = [(left * self.tile_size, top * self.tile_size,
+                  min(right * self.tile_size, width), min(bottom * self.tile_size, height))
+                 for left, top, right, bottom in changed_regions(changed)]
+        # Grow regions to cover elements they cut through, so those are re-recognized whole, and
+        # merge regions that then touch; growing a merged region can reach further elements
+        while True:
+            grown = []
+            for box in boxes:
+                for element in self.elements:
+                    if 'bounds' in element and _overlaps(element['bounds'], box):
+                        bounds = element['bounds']
+                        box = (max(0, min(box[0], int(bounds[0]))), max(0, min(box[1], int(bounds[1]))),
+                               min(width, max(box[2], int(np.ceil(bounds[2])))),
+                               min(height, max(box[3], int(np.ceil(bounds[3])))))
+                grown.append(box)
+            grown = merge_boxes(grown)
+            if grown == boxes:
+                break
+            boxes = grown
+        self.stats['regions'] += len(boxes)
+
+        kept = [element for element in self.elements
+                if 'bounds' not in element or not any(_overlaps(element['bounds'], box) for box in boxes)]
+        results = self.recognize([image.crop(box) for box in boxes])
+        for box, region_elements in zip(boxes, results):
+            for element in region_elements:
+                element = dict(element)
+                if 'bounds' in element:
+                    left, top, right, bottom = element['bounds']
+                    element['bounds'] = [left + box[0], top + box[1], right + box[0], bottom + box[1]]
+                if not self._is_duplicate(element, kept):
+                    kept.append(element)
+        return kept
+
+    def _is_duplicate(self, element: Dict[str, Any], elements: List[Dict[str, Any]]) -> bool:
+        if 'bounds' not in element:
+            return element in elements
+        key = (element.get('type'), element.get('text'))
+        return any(key == (other.get('type'), other.get('text')) and 'bounds' in other
+                   and _iou(other['bounds'], element['bounds']) >= self.min_iou for other in elements)
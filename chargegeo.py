@@ -0,0 +1,123 @@
+from typing import List, Dict, Any, Tuple
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in kilometres between points given in degrees.
+    Works element-wise on NumPy arrays.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def station_coordinates(stations: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (latitudes, longitudes) arrays for stations; NaN where a station has no coordinates.
+    """
+    count = len(stations)
+    latitudes = np.fromiter((s.get('latitude', np.nan) for s in stations), dtype=np.float64, count=count)
+    longitudes = np.fromiter((s.get('longitude', np.nan) for s in stations), dtype=np.float64, count=count)
+    return latitudes, longitudes
+
+
+class StationIndex:
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_degrees: float = 0.1):
+        """
+        Grid index over station coordinates for radius and nearest queries.
+
+        Stations are bucketed into cell_degrees square cells and stored
+        sorted by cell, so the stations of consecutive cells in one grid row
+        form one slice. A query visits only the cells its radius can reach
+        and computes exact haversine distances for the stations in them.
+        Stations without coordinates (NaN) are left out. Build it once per
+        station set; queries do not modify it.
+        """
+        self.cell_degrees = cell_degrees
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self._columns = int(np.ceil(360 / cell_degrees))
+        located = np.flatnonzero(~(np.isnan(self.latitudes) | np.isnan(self.longitudes)))
+        keys = self._cell_key(self._row(self.latitudes[located]), self._column(self.longitudes[located]))
+        order = np.argsort(keys, kind='stable')
+        self._order = located[order]
+        self._keys = keys[order]
+
+    @classmethod
+    def from_stations(cls, stations: List[Dict[str, Any]], cell_degrees: float = 0.1) -> 'StationIndex':
+        """
+        Index station dicts by their 'latitude' and 'longitude' fields.
+        """
+        return cls(*station_coordinates(stations), cell_degrees=cell_degrees)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _row(self, latitudes: np.ndarray) -> np.ndarray:
+        return np.floor((np.asarray(latitudes) + 90) / self.cell_degrees).astype(np.int64)
+
+    def _column(self, longitudes: np.ndarray) -> np.ndarray:
+        return np.floor((np.mod(np.asarray(longitudes) + 180, 360)) / self.cell_degrees).astype(np.int64) \
+            % self._columns
+
+    def _cell_key(self, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        return rows * self._columns + columns
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """
+        Return the stations in every cell that may lie within radius_km.
+        """
+        lat_span = radius_km / KM_PER_DEGREE
+        first_row, last_row = self._row(max(latitude - lat_span, -90.0)), self._row(min(latitude + lat_span, 90.0))
+        # Longitude degrees shrink towards the poles, so widen the span by the row furthest from the equator
+        widest = min(abs(latitude) + lat_span, 90.0)
+        cos_lat = np.cos(np.radians(widest))
+        lon_span = radius_km / (KM_PER_DEGREE * cos_lat) if cos_lat > 1e-9 else 360.0
+        if lon_span >= 180:
+            column_ranges = [(0, self._columns - 1)]
+        else:
+            first_column, last_column = self._column(longitude - lon_span), self._column(longitude + lon_span)
+            if first_column <= last_column:
+                column_ranges = [(first_column, last_column)]
+            else:  # The range wraps around the antimeridian
+                column_ranges = [(first_column, self._columns - 1), (0, last_column)]
+
+        slices = []
+        for row in range(first_row, last_row + 1):
+            for first_column, last_column in column_ranges:
+                start, stop = np.searchsorted(self._keys, [self._cell_key(row, first_column),
+                                                           self._cell_key(row, last_column) + 1])
+                if stop > start:
+                    slices.append(self._order[start:stop])
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.intp)
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (indices, distances in km) of the stations within radius_km of
+        the point, nearest first.
+        """
+        candidates = self._candidates(latitude, longitude, radius_km)
+        distances = haversine_km(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.lexsort((candidates, distances))
+        return candidates[order], distances[order]
+
+    def nearest(self, latitude: float, longitude: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (indices, distances in km) of the k stations nearest the point,
+        nearest first.
+        """
+        if k <= 0 or not len(self):
+            return np.empty(0, dtype=np.intp), np.empty(0)
+        # Grow the search radius until it holds k stations; everything nearer is then inside it
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            indices, distances = self.within(latitude, longitude, radius_km)
+            if len(indices) >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+                return indices[:k], distances[:k]
+            radius_km *= 2
@@ -0,0 +1,54 @@
+import importlib
+import threading
+from typing import Any, Optional
+
+
+class LazyImport:
+    """
+    Stands in for a module, or for an attribute of a module, and imports it
+    the first time it is used. Attribute lookups and calls go to the real
+    object, so `np = lazy_import('numpy')` and
+    `resnet18 = lazy_import('torchvision.models', 'resnet18')` work like the
+    usual import statements once the module has loaded.
+
+    A proxy cannot be used where Python needs the real object, e.g. as a base
+    class, in an except clause or with isinstance.
+    """
+    def __init__(self, module: str, attribute: Optional[str] = None):
+        self._lazy_module = module
+        self._lazy_attribute = attribute
+        self._lazy_target = None
+        self._lazy_lock = threading.Lock()
+
+    def _lazy_resolve(self) -> Any:
+        if self._lazy_target is None:
+            with self._lazy_lock:
+                if self._lazy_target is None:
+                    target = importlib.import_module(self._lazy_module)
+                    if self._lazy_attribute is not None:
+                        target = getattr(target, self._lazy_attribute)
+                    self._lazy_target = target
+        return self._lazy_target
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for names not yet cached on the proxy
+        if name.startswith('_lazy_'):
+            raise AttributeError(name)
+        value = getattr(self._lazy_resolve(), name)
+        setattr(self, name, value)
+        return value
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._lazy_resolve()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = self._lazy_module if self._lazy_attribute is None else f"{self._lazy_module}.{self._lazy_attribute}"
+        state = 'loaded' if self._lazy_target is not None else 'not loaded'
+        return f"<lazy import {name} ({state})>"
+
+
+def lazy_import(module: str, attribute: Optional[str] = None) -> Any:
+    """
+    Return a proxy that imports module (and takes attribute from it) on first use.
+    """
+    return LazyImport(module, attribute)
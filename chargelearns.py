@@ -1,98 +1,360 @@
+from __future__ import annotations
+import copy
+import threading
 import time
-from typing import List, Dict, Any
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-import joblib
-
-class ChargeSystem:
-    def __init__(self):
-        self.driver = webdriver.Chrome()
-        self.wait = WebDriverWait(self.driver, 10)
+from typing import List, Dict, Any, Optional, Iterator
+from chargelazy import lazy_import
+from chargepools import BrowserPool, DriverSessionMixin
+from chargetraces import TracedMixin
+from chargewaits import page_settled
+
+# Heavy dependencies are imported on first use, so importing this module is cheap
+By = lazy_import('selenium.webdriver.common.by', 'By')
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+RandomForestRegressor = lazy_import('sklearn.ensemble', 'RandomForestRegressor')
+clone = lazy_import('sklearn.base', 'clone')
+train_test_split = lazy_import('sklearn.model_selection', 'train_test_split')
+joblib = lazy_import('joblib')
+InteractionStore = lazy_import('chargestores', 'InteractionStore')
+ForestUpdater = lazy_import('chargeforests', 'ForestUpdater')
+FeatureSchema = lazy_import('chargepredicts', 'FeatureSchema')
+MicroBatcher = lazy_import('chargepredicts', 'MicroBatcher')
+ModelRegistry = lazy_import('chargeregistry', 'ModelRegistry')
+BackgroundTrainer = lazy_import('chargetrainer', 'BackgroundTrainer')
+TrainingPolicy = lazy_import('chargetrainer', 'TrainingPolicy')
+
+# Here, you'd map the numerical prediction to an action. This is just an example:
+ACTION_MAP = {0: "Confirm Payment", 1: "Retry Transaction", 2: "Cancel Transaction"}
+
+class ChargeSystem(DriverSessionMixin, TracedMixin):
+    # Payment system site; override per class or instance, e.g. to point at a test server
+    site_url = "example-charge-system.com"
+
+    def __init__(self, pool: Optional[BrowserPool] = None, store: Optional[InteractionStore] = None,
+                 forest_updater: Optional[ForestUpdater] = None, registry: Optional[ModelRegistry] = None,
+                 refresh_interval: float = 5.0):
+        self._init_driver(pool)
+        # Interactions go to the persistent columnar store when one is given,
+        # otherwise to the in-memory list
+        self.store = store
         self.interaction_log = []
-        self.model = None
+        # Guards the log against a background trainer's snapshot; predictions never take it
+        self._log_lock = threading.Lock()
+        # Settings for incremental training and the core count used for fitting
+        self.forest_updater = forest_updater or ForestUpdater()
+        # What the model has already been trained on, for incremental training
+        self._trained_rows = 0
+        self._trained_until = None
+        # The model and the feature columns it was trained on (in training order).
+        # They are replaced together as one tuple, so a prediction never pairs a
+        # model with another model's schema and never waits for a swap.
+        self._active = (None, None)
+        self.batcher = None
+        self.trainer = None
+        # With a registry the model is loaded lazily on first use, and a newer
+        # version is picked up at most every refresh_interval seconds
+        self.registry = registry
+        self.refresh_interval = refresh_interval
+        self.model_version = None
+        self.model_load_seconds = None
+        self._checked_registry_at = None
         self.load_model()
 
+    @property
+    def model(self):
+        return self._active[0]
+
+    @model.setter
+    def model(self, model):
+        self._active = (model, self._active[1])
+
+    @property
+    def schema(self):
+        return self._active[1]
+
+    @schema.setter
+    def schema(self, schema):
+        self._active = (self._active[0], schema)
+
+    @property
+    def active(self) -> tuple:
+        """
+        The (model, schema) pair predictions currently use, read in one step.
+        """
+        return self._active
+
+    def install_model(self, model, schema: Optional[FeatureSchema]):
+        """
+        Switch predictions to model and its schema in one step.
+        """
+        self._active = (model, schema)
+
     def load_model(self):
         """
         Load or initialize the machine learning model for decision making in charge transactions.
         """
+        if self.registry is not None:
+            return  # Loaded on first use by _refresh_model
+
         try:
             self.model = joblib.load('charge_model.joblib')
         except FileNotFoundError:
             # If no model exists, initialize one
-            self.model = RandomForestRegressor()
+            self.model = RandomForestRegressor(n_estimators=self.forest_updater.full_trees,
+                                               n_jobs=self.forest_updater.n_jobs)
             print("No model found. Initialized a new model.")
+            return
+        try:
+            self.schema = FeatureSchema.load('charge_schema.json')
+        except FileNotFoundError:
+            pass  # Models saved without a schema infer feature columns per call
+
+    def _refresh_model(self):
+        """
+        Load the newest registry version if it is not the one in use.
+        Checks the registry at most every refresh_interval seconds.
+        """
+        if self.registry is None:
+            return
+        now = time.monotonic()
+        if self._checked_registry_at is not None and now - self._checked_registry_at < self.refresh_interval:
+            return
+        self._checked_registry_at = now
+
+        latest = self.registry.latest_version()
+        if latest is None:
+            if self.model is None:
+                self.model = RandomForestRegressor(n_estimators=self.forest_updater.full_trees,
+                                                   n_jobs=self.forest_updater.n_jobs)
+                print("No model found. Initialized a new model.")
+            return
+        if latest != self.model_version:
+            start = time.perf_counter()
+            model, schema, version = self.registry.load(latest)
+            self.model_load_seconds = time.perf_counter() - start
+            self.install_model(model, schema)
+            self.model_version = version
+
+    def preload_model(self):
+        """
+        Load the newest registry version now instead of on first prediction,
+        e.g. in a parent process before forking workers so they share its pages.
+        """
+        self._checked_registry_at = None
+        self._refresh_model()
 
     def save_model(self):
         """
         Save the current machine learning model to disk.
+        With a registry, this writes a new version instead of overwriting the file.
         """
-        joblib.dump(self.model, 'charge_model.joblib')
+        model, schema = self._active
+        if self.registry is not None:
+            self.model_version = self.registry.save(model, schema)
+            return
+
+        joblib.dump(model, 'charge_model.joblib')
+        if schema is not None:
+            schema.save('charge_schema.json')
 
     def log_interaction(self, interaction: Dict[str, Any]):
         """
         Log interaction details for learning purposes.
         """
-        self.interaction_log.append(interaction)
+        with self._log_lock:
+            if self.store is not None:
+                self.store.append(interaction)
+            else:
+                self.interaction_log.append(interaction)
+        if self.trainer is not None:
+            self.trainer.observe(interaction)
 
-    def prepare_data(self) -> pd.DataFrame:
+    def prepare_data(self, since: Optional[float] = None, until: Optional[float] = None) -> pd.DataFrame:
         """
         Prepare interaction data for machine learning.
+        With a store, since/until (Unix timestamps) select a time window of it.
         """
+        if self.store is not None:
+            # Built straight from the memory-mapped columns
+            return self.store.to_frame(since, until)
+
         # Convert list of dicts to DataFrame for easier manipulation
         df = pd.DataFrame(self.interaction_log)
         # Here you would typically preprocess data, encode categorical variables, etc.
         return df
 
-    def train_model(self):
+    def snapshot_data(self) -> pd.DataFrame:
+        """
+        Interaction data logged so far, safe to take while another thread logs.
+        """
+        with self._log_lock:
+            if self.store is not None:
+                # Flushes the buffer; rows already written are never rewritten, so the mapping stays valid
+                columns = self.store.columns()
+            else:
+                rows = list(self.interaction_log)
+        if self.store is not None:
+            return pd.DataFrame(columns, copy=False)
+        return pd.DataFrame(rows)
+
+    def stream_data(self, chunk_rows: int = 65536, since: Optional[float] = None,
+                    until: Optional[float] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yield interaction data in chunks of at most chunk_rows rows.
+        """
+        if self.store is not None:
+            yield from self.store.iter_frames(chunk_rows, since, until)
+            return
+        for start in range(0, len(self.interaction_log), chunk_rows):
+            yield pd.DataFrame(self.interaction_log[start:start + chunk_rows])
+
+    def has_interactions(self) -> bool:
+        """
+        Whether any interaction has been logged.
+        """
+        return len(self.store) > 0 if self.store is not None else bool(self.interaction_log)
+
+    def train_model(self, since: Optional[float] = None, until: Optional[float] = None,
+                    incremental: bool = False):
         """
         Train the machine learning model on past interactions related to charges and transactions.
+        With a store, since/until restrict training to a time window.
+        With incremental=True, only interactions logged since the last fit are used, and new
+        trees are added to the forest instead of refitting it (see chargeforests.ForestUpdater).
         """
-        if not self.interaction_log:
+        if not self.has_interactions():
             print("No interaction data to train on.")
             return
+        self._refresh_model()
 
-        df = self.prepare_data()
+        df = self._new_interactions() if incremental else self.prepare_data(since, until)
         if 'outcome' not in df.columns or df['outcome'].isnull().all():
             print("No outcome data to train on.")
             return
+        # Rows without an outcome carry no training signal
+        df = df[df['outcome'].notnull()]
 
         # Assuming 'outcome' is the target variable, and all other columns are features
         features = df.drop(columns=['outcome'])
         X = features.select_dtypes(include=[np.number]).values  # Only numeric features for simplicity
         y = df['outcome'].values
+        schema = FeatureSchema.from_frame(features)
+
+        # Fit a separate model object so predictions keep using the current one until it is installed
+        if incremental:
+            model = self.forest_updater.update(copy.deepcopy(self.model), X, y)
+        else:
+            # Split dataset into training set and test set
+            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-        # Split dataset into training set and test set
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Train the model
-        self.model.fit(X_train, y_train)
-        
+            # Train the model from scratch at full size (updates and pruning change n_estimators), using every core
+            model = clone(self.model).set_params(warm_start=False, n_estimators=self.forest_updater.full_trees,
+                                                 n_jobs=self.forest_updater.n_jobs)
+            model.fit(X_train, y_train)
+
+        self.install_model(model, schema)
+        self._mark_trained()
         # Here you could add model evaluation or cross-validation
         self.save_model()
 
+    def _new_interactions(self) -> pd.DataFrame:
+        """
+        Interactions logged since the last fit.
+        """
+        if self.store is not None:
+            since = None if self._trained_until is None else np.nextafter(self._trained_until, np.inf)
+            return self.store.to_frame(since)
+        return pd.DataFrame(self.interaction_log[self._trained_rows:])
+
+    def _mark_trained(self):
+        """
+        Remember how far the log has been trained on.
+        """
+        if self.store is not None:
+            with self._log_lock:
+                self._trained_until = self.store.last_timestamp()
+        else:
+            self._trained_rows = len(self.interaction_log)
+
+    def trained_rows(self) -> Optional[int]:
+        """
+        How many logged interactions, oldest first, train_model has fitted on;
+        None if unknown (a model loaded from disk may have seen any stored row).
+        """
+        if self.store is None:
+            return self._trained_rows
+        if self._trained_until is None:
+            return None
+        # Counting flushes the store's buffer, which must not overlap an append
+        with self._log_lock:
+            return self.store.count_until(self._trained_until)
+
     def predict_action(self, current_state: Dict[str, Any]) -> str:
         """
         Predict the best action (such as confirming a charge, retrying a transaction, etc.)
         based on the current state of the transaction process.
         """
-        if self.model is None:
+        if self.batcher is not None:
+            # Concurrent callers are answered together by one predict call
+            return self.batcher(current_state)
+        return self.predict_actions([current_state])[0]
+
+    def predict_actions(self, states: List[Dict[str, Any]]) -> List[str]:
+        """
+        Predict the best action for many transaction states with a single model call.
+        """
+        self._refresh_model()
+        # Read model and schema once: a background trainer may install a new pair at any time
+        model, schema = self._active
+        if model is None or not hasattr(model, 'estimators_'):
             print("Model not trained or loaded. Using default action.")
-            return "Confirm Payment"  # Fallback action
+            return ["Confirm Payment"] * len(states)  # Fallback action
 
-        # Convert current state to a format matching training data
-        features = pd.DataFrame([current_state]).select_dtypes(include=[np.number]).values
-        prediction = self.model.predict(features)
-        
-        # Here, you'd map the numerical prediction to an action. This is just an example:
-        action_map = {0: "Confirm Payment", 1: "Retry Transaction", 2: "Cancel Transaction"}
-        return action_map.get(int(prediction[0]), "Unknown Action")
+        if schema is not None:
+            # Fields go straight into a float array in training column order
+            features = schema.to_array(states)
+        else:
+            # Convert states to a format matching training data
+            features = pd.DataFrame(states).select_dtypes(include=[np.number]).values
+        predictions = model.predict(features).astype(int)
+        return [ACTION_MAP.get(prediction, "Unknown Action") for prediction in predictions.tolist()]
+
+    def start_batching(self, max_batch: int = 64, max_delay: float = 0.002) -> MicroBatcher:
+        """
+        Route predict_action through a micro-batcher so concurrent payment
+        sessions share predict calls. Call stop_batching to turn it off.
+        """
+        if self.batcher is None:
+            self.batcher = MicroBatcher(self.predict_actions, max_batch, max_delay)
+        return self.batcher
+
+    def stop_batching(self):
+        """
+        Answer outstanding batched requests and return to direct prediction.
+        """
+        if self.batcher is not None:
+            batcher, self.batcher = self.batcher, None
+            batcher.close()
+
+    def start_background_training(self, policy: Optional[TrainingPolicy] = None, **kwargs) -> BackgroundTrainer:
+        """
+        Refit the model in a separate process whenever policy says so, and
+        install each validated model without pausing predictions (see
+        chargetrainer.BackgroundTrainer for kwargs). Call
+        stop_background_training to turn it off.
+        """
+        if self.trainer is None:
+            self.trainer = BackgroundTrainer(self, policy, **kwargs)
+        return self.trainer
+
+    def stop_background_training(self, wait: bool = True):
+        """
+        Stop refitting in the background; with wait, let a running fit finish first.
+        """
+        if self.trainer is not None:
+            trainer, self.trainer = self.trainer, None
+            trainer.close(wait)
 
     def perform_action(self, action: str):
         """
@@ -114,38 +376,57 @@ class ChargeSystem:
         """
         Execute a task by learning from past interactions with the charge system and making decisions.
         """
-        self.driver.get("example-charge-system.com")
-        
-        # Simulate some interactions related to charging/payment
-        for _ in range(5):  # Simulating 5 interactions for training data
-            current_state = {
-                'payment_amount': np.random.uniform(1, 1000),  # Random payment amount
-                'payment_method': np.random.choice([0, 1, 2]),  # 0: Credit Card, 1: PayPal, 2: Bank Transfer
-                'payment_status': np.random.choice([0, 1]),  # 0: Failed, 1: Successful
-                'outcome': np.random.uniform(0, 1)  # 0 to 1 as a proxy for success rate
-            }
-            self.log_interaction(current_state)
+        trace = self.trace
+        with trace.span('ChargeSystem.execute_task'), self.driver_session():
+            with trace.span('ChargeSystem.browser'):
+                self._open_driver()
+            with trace.span('ChargeSystem.navigate'):
+                self.driver.get(self.site_url)
             
-            # Predict action based on current state
-            action = self.predict_action(current_state)
-            self.perform_action(action)
-            time.sleep(2)  # Simulate time passing
-
-        # After some interactions, train the model
-        self.train_model()
-        
-        # Now, for the actual task, use the trained model
-        final_state = {
-            'payment_amount': 150,
-            'payment_method': 0,  # Credit Card
-            'payment_status': 1  # Successful
-        }
-        final_action = self.predict_action(final_state)
-        self.perform_action(final_action)
-
-        print("Charge task execution completed with learning from past interactions.")
-        self.driver.quit()
-
-# Example usage
-charge_system = ChargeSystem()
-charge_system.execute_task("Process a payment on the charge system")
+            # Simulate some interactions related to charging/payment
+            for _ in range(5):  # Simulating 5 interactions for training data
+                current_state = {
+                    'payment_amount': np.random.uniform(1, 1000),  # Random payment amount
+                    'payment_method': np.random.choice([0, 1, 2]),  # 0: Credit Card, 1: PayPal, 2: Bank Transfer
+                    'payment_status': np.random.choice([0, 1]),  # 0: Failed, 1: Successful
+                    'outcome': np.random.uniform(0, 1)  # 0 to 1 as a proxy for success rate
+                }
+                with trace.span('ChargeSystem.log_interaction'):
+                    self.log_interaction(current_state)
+                
+                # Predict action based on current state
+                with trace.span('ChargeSystem.predict'):
+                    action = self.predict_action(current_state)
+                with trace.span('ChargeSystem.perform', action=action):
+                    self.perform_action(action)
+                trace.count('actions', agent='ChargeSystem', action=action)
+                # Wait for the page to settle after the action, for at most the old 2 second pause
+                with trace.span('ChargeSystem.wait'):
+                    self.waiter.until(page_settled(), timeout=2, raise_on_timeout=False)
+
+            # After some interactions, train the model, unless a background trainer does it
+            if self.trainer is None:
+                with trace.span('ChargeSystem.train'):
+                    self.train_model()
+            
+            # Now, for the actual task, use the trained model
+            final_state = {
+                'payment_amount': 150,
+                'payment_method': 0,  # Credit Card
+                'payment_status': 1  # Successful
+            }
+            with trace.span('ChargeSystem.predict'):
+                final_action = self.predict_action(final_state)
+            with trace.span('ChargeSystem.perform', action=final_action):
+                self.perform_action(final_action)
+            trace.count('actions', agent='ChargeSystem', action=final_action)
+
+            if self.store is not None:
+                with trace.span('ChargeSystem.flush_store'):
+                    self.store.flush()
+            print("Charge task execution completed with learning from past interactions.")
+
+# Example usage (see chargecli.py for the command line entry point)
+if __name__ == "__main__":
+    charge_system = ChargeSystem()
+    charge_system.execute_task("Process a payment on the charge system")
@@ -1,17 +1,23 @@
-import time
-from typing import List, Dict, Any
-from selenium import webdriver  # For web interaction
-import numpy as np
-from transformers import AutoModel, AutoTokenizer
+from __future__ import annotations
+from typing import List, Dict, Any, Optional
+from chargelazy import lazy_import
+from chargepools import BrowserPool, DriverSessionMixin
+from chargetraces import TracedMixin
+from chargewaits import page_settled
 
-class ChargeAI:
-    def __init__(self):
-        # Load pre-trained model (using Hugging Face's transformer models as an example)
-        self.tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
-        self.model = AutoModel.from_pretrained("bert-base-uncased")
+# Heavy dependencies are imported on first use, so importing this module is cheap
+get_shared_encoder = lazy_import('chargeencoders', 'get_shared_encoder')
+
+class ChargeAI(DriverSessionMixin, TracedMixin):
+    def __init__(self, pool: Optional[BrowserPool] = None, optimized: bool = False,
+                 num_threads: Optional[int] = None):
+        # Pre-trained text encoder (using Hugging Face's transformer models as an example).
+        # One encoder is shared by every agent in the process and loads its weights on first use.
+        # optimized=True uses the int8 CPU inference path (see chargeencoders.optimize_for_cpu).
+        self.encoder = get_shared_encoder("bert-base-uncased", optimized=optimized, num_threads=num_threads)
         
         # Initialize web driver for browser automation
-        self.driver = webdriver.Chrome()
+        self._init_driver(pool)
         
         # State management for context
         self.context = {'current_page': None, 'user_intent': None, 'history': []}
@@ -19,11 +25,15 @@ class ChargeAI:
     def understand_context(self, text: str) -> Dict[str, Any]:
         """
         Analyze the text to understand the context and user intent for Charge AI.
+        Repeated instructions are answered from the encoder's intent cache.
         """
-        inputs = self.tokenizer(text, return_tensors="pt")
-        outputs = self.model(**inputs)
-        
-        # Here, you'd perform some analysis on the outputs to derive context and intent
+        return self.encoder.understand(text, self._interpret_context, namespace='ChargeAI')
+
+    def _interpret_context(self, embedding) -> Dict[str, Any]:
+        """
+        Derive context and intent from the encoded instruction.
+        """
+        # Here, you'd perform some analysis on the embedding to derive context and intent
         # For simplicity, we'll mock this:
         return {
             'context': "Cryptocurrency trading",
@@ -68,24 +78,34 @@ class ChargeAI:
         
         # Update context history
         self.context['history'].append(action)
-        time.sleep(2)  # Simulate human-like delay
+        # Wait for the page to settle after the action, for at most the old 2 second delay
+        self.waiter.until(page_settled(), timeout=2, raise_on_timeout=False)
 
     def execute_task(self, task_description: str):
         """
         Execute a task by understanding context, predicting actions, and performing them.
         """
-        context = self.understand_context(task_description)
-        actions = self.predict_actions(context)
-        
-        for action in actions:
-            try:
-                self.perform_action(action)
-            except Exception as e:
-                print(f"Failed to perform action {action}: {e}")
-        
-        print("Task execution completed.")
-        self.driver.quit()
+        trace = self.trace
+        with trace.span('ChargeAI.execute_task'), self.driver_session():
+            with trace.span('ChargeAI.understand'):
+                context = self.understand_context(task_description)
+            with trace.span('ChargeAI.plan') as span:
+                actions = self.predict_actions(context)
+                span.set(actions=len(actions))
+            with trace.span('ChargeAI.browser'):
+                self._open_driver()
+            
+            for action in actions:
+                try:
+                    with trace.span('ChargeAI.perform', action=action):
+                        self.perform_action(action)
+                except Exception as e:
+                    trace.count('action_failures', agent='ChargeAI', action=action)
+                    print(f"Failed to perform action {action}: {e}")
+            
+            print("Task execution completed.")
 
-# Example usage
-charge_ai = ChargeAI()
-charge_ai.execute_task("Optimize trading strategy for Solana with front-running on the market")
+# Example usage (see chargecli.py for the command line entry point)
+if __name__ == "__main__":
+    charge_ai = ChargeAI()
+    charge_ai.execute_task("Optimize trading strategy for Solana with front-running on the market")
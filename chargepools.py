@@ -0,0 +1,253 @@
+import contextlib
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+from chargelazy import lazy_import
+from chargewaits import WaitEngine
+
+# Selenium's webdriver package imports every browser backend, so load it on first use
+webdriver = lazy_import('selenium.webdriver')
+WebDriverWait = lazy_import('selenium.webdriver.support.ui', 'WebDriverWait')
+
+
+def headless_chrome():
+    """
+    Start a headless Chrome driver suitable for pooling.
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    def __init__(self, max_sessions: int = 4, idle_timeout: float = 300.0, max_uses: int = 100,
+                 driver_factory: Optional[Callable[[], Any]] = None, acquire_timeout: Optional[float] = None):
+        """
+        A pool of reusable browser sessions shared by the Charge agents.
+
+        Drivers are started lazily, reset between tasks and handed out again.
+        At most max_sessions drivers exist at once; sessions idle longer than
+        idle_timeout or used more than max_uses times are quit. Once a
+        session has been released, a background thread checks for idle
+        sessions every idle_timeout / 2 seconds, so an unused pool does not
+        keep its browsers running.
+        acquire_timeout bounds how long acquire waits for a free session
+        unless a timeout is passed to it (None waits indefinitely).
+        """
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self.driver_factory = driver_factory or headless_chrome
+        self.acquire_timeout = acquire_timeout
+        self._idle = []  # (driver, last released at), most recently used last
+        self._uses = {}
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._reaper = None
+        self._stop_reaper = threading.Event()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'reset_failures': 0}
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Take a driver from the pool, starting a new one if none is idle.
+        Blocks while max_sessions drivers are in use, for at most timeout
+        seconds (acquire_timeout by default), then raises TimeoutError.
+        """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    driver, _ = self._idle.pop()
+                    self.stats['hits'] += 1
+                    return driver
+                if self._total < self.max_sessions:
+                    self._total += 1
+                    self.stats['misses'] += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No browser session available within {timeout} seconds.")
+                self._condition.wait(remaining)
+
+        # Start the browser outside the lock so other callers are not blocked
+        try:
+            driver = self.driver_factory()
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+        self._uses[id(driver)] = 0
+        return driver
+
+    def release(self, driver):
+        """
+        Reset a driver and return it to the pool. Drivers that fail to reset
+        or have reached max_uses are quit instead.
+        """
+        with self._condition:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+        healthy = not self._closed and uses < self.max_uses and self._reset(driver)
+        with self._condition:
+            if healthy:
+                self._idle.append((driver, time.monotonic()))
+                if self._reaper is None:
+                    self._reaper = threading.Thread(target=self._reap, name='charge-pool-reaper', daemon=True)
+                    self._reaper.start()
+            else:
+                self._discard(driver)
+            self._condition.notify()
+
+    def prune_idle(self):
+        """
+        Quit sessions that have been idle longer than idle_timeout now.
+        """
+        with self._condition:
+            self._evict_idle()
+
+    def _reap(self):
+        # Never spin, even with an idle_timeout of zero
+        while not self._stop_reaper.wait(max(self.idle_timeout / 2, 0.1)):
+            self.prune_idle()
+
+    def _reset(self, driver) -> bool:
+        """
+        Clear all browser state the last task left: the cookies and storage
+        of every origin it visited, not just the current page's. Returns
+        False if the driver is unhealthy or cannot be fully reset, so it is
+        discarded rather than handed to the next task.
+        """
+        try:
+            driver.get("about:blank")
+            # Through the DevTools protocol, which reaches every origin rather than only the current one
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'})
+            return driver.execute_script("return 1;") == 1
+        except Exception as e:
+            self.stats['reset_failures'] += 1
+            print(f"Discarding a browser session that could not be reset: {type(e).__name__}: {e}")
+            return False
+
+    def _evict_idle(self):
+        """
+        Quit sessions that have been idle longer than idle_timeout.
+        Must be called with the pool lock held.
+        """
+        now = time.monotonic()
+        keep = []
+        for driver, released_at in self._idle:
+            if now - released_at > self.idle_timeout:
+                self._discard(driver)
+            else:
+                keep.append((driver, released_at))
+        self._idle = keep
+
+    def _discard(self, driver):
+        """
+        Quit a driver and free its slot. Must be called with the pool lock held.
+        """
+        self._uses.pop(id(driver), None)
+        self._total -= 1
+        self.stats['evictions'] += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass  # The browser may already be gone
+
+    def close(self):
+        """
+        Quit every idle driver. Drivers still in use are quit when released.
+        """
+        with self._condition:
+            for driver, _ in self._idle:
+                self._discard(driver)
+            self._idle = []
+            self._closed = True
+        self._stop_reaper.set()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Return pool hit/miss counts and current occupancy.
+        """
+        with self._condition:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats, sessions=self._total, idle=len(self._idle),
+                        hit_rate=self.stats['hits'] / lookups if lookups else 0.0)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> BrowserPool:
+    """
+    Return the process-wide browser pool, creating it on first use.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool()
+        return _default_pool
+
+
+class DriverSessionMixin:
+    """
+    Gives an agent a driver that comes from a BrowserPool when one is set,
+    or from a fresh webdriver.Chrome() otherwise.
+    """
+    pool = None
+    driver = None
+    waiter = None
+
+    def _init_driver(self, pool: Optional[BrowserPool]):
+        """
+        Pooled agents borrow a driver when a task starts. Without a pool the
+        driver is started up front, as before.
+        """
+        self.pool = pool
+        if pool is None:
+            self._open_driver()
+
+    def _open_driver(self):
+        """
+        Make sure the agent holds a driver for the next task.
+        """
+        if self.driver is None:
+            self.driver = self.pool.acquire() if self.pool is not None else webdriver.Chrome()
+            self.wait = WebDriverWait(self.driver, 10)
+            # The wait engine outlives drivers so its timings cover every task
+            if self.waiter is None:
+                self.waiter = WaitEngine(self.driver)
+            else:
+                self.waiter.driver = self.driver
+        return self.driver
+
+    @contextlib.contextmanager
+    def driver_session(self):
+        """
+        Scope of one task: the driver the task opens is handed back when the
+        block ends, even if a step raises, so a pooled session is never leaked.
+        """
+        try:
+            yield
+        finally:
+            self._close_driver()
+
+    def _close_driver(self):
+        """
+        Hand the driver back to the pool, or quit it when not pooled.
+        """
+        if self.driver is None:
+            return
+        if self.pool is not None:
+            self.pool.release(self.driver)
+        else:
+            self.driver.quit()
+        self.driver = None
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from operator import itemgetter
+from typing import List, Dict, Any, Callable
+import numpy as np
+from chargelazy import lazy_import
+
+# Only needed for type hints and by callers that already use pandas
+pd = lazy_import('pandas')
+
+
+class FeatureSchema:
+    def __init__(self, columns: List[str]):
+        """
+        Ordered feature columns, compiled once from the training data so
+        prediction inputs go straight into a float array in training order.
+        """
+        if not columns:
+            raise ValueError("A feature schema needs at least one column.")
+        self.columns = list(columns)
+        self._getter = itemgetter(*self.columns)
+
+    @classmethod
+    def from_frame(cls, features: pd.DataFrame) -> 'FeatureSchema':
+        """
+        Compile a schema from the numeric feature columns used for training.
+        """
+        return cls(list(features.select_dtypes(include=[np.number]).columns))
+
+    def to_array(self, states: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Convert states into a contiguous (n_states, n_features) float64 array.
+        Fields not in the schema are ignored.
+        """
+        try:
+            rows = list(map(self._getter, states))
+        except KeyError as e:
+            raise ValueError(f"State is missing feature {e.args[0]!r} required by the model.") from None
+        return np.array(rows, dtype=np.float64).reshape(len(states), len(self.columns))
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'columns': self.columns}, f)
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureSchema':
+        with open(path) as f:
+            return cls(json.load(f)['columns'])
+
+
+class MicroBatcher:
+    def __init__(self, predict_many: Callable[[List[Any]], List[Any]], max_batch: int = 64,
+                 max_delay: float = 0.002):
+        """
+        Gathers concurrent single requests into batched predict_many calls.
+
+        A background thread waits for the first request, then collects more
+        for up to max_delay seconds or until max_batch are queued, and
+        answers all of them from one predict_many call.
+        """
+        self.predict_many = predict_many
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = {'requests': 0, 'batches': 0}
+        self._queue = queue.Queue()
+        self._closed = False
+        # Makes the closed check and the put one step, so nothing is queued behind the stop sentinel
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='charge-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue one request and return a Future for its result.
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed.")
+            self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """
+        Queue one request and block until its result is ready.
+        """
+        return self.submit(item).result()
+
+    def _run(self):
+        try:
+            self._serve()
+        finally:
+            self._fail_pending()
+
+    def _serve(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            try:
+                while len(batch) < self.max_batch:
+                    entry = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    if entry is None:
+                        self._queue.put(None)  # Answer this batch, then stop
+                        break
+                    batch.append(entry)
+            except queue.Empty:
+                pass
+            self._answer(batch)
+
+    def _answer(self, batch: List[Any]):
+        items = [item for item, _ in batch]
+        self.stats['requests'] += len(batch)
+        self.stats['batches'] += 1
+        try:
+            results = self.predict_many(items)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _fail_pending(self):
+        """
+        Fail requests still queued when the background thread stops, so no caller waits forever.
+        """
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not None:
+                entry[1].set_exception(RuntimeError("MicroBatcher stopped before answering the request."))
+
+    def close(self):
+        """
+        Answer every queued request, then stop the background thread.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(None)
+        self._thread.join()
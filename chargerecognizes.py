@@ -1,63 +1,137 @@
-import time
-from typing import List, Dict, Any
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import numpy as np
-from transformers import AutoModel, AutoTokenizer
-from PIL import Image
-import torch
-import torchvision.transforms as transforms
-from torchvision.models import resnet18
-
-class ChargeAssistant:
-    def __init__(self):
-        # NLP Model
-        self.tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
-        self.nlp_model = AutoModel.from_pretrained("bert-base-uncased")
+from __future__ import annotations
+import io
+from typing import List, Dict, Any, Optional, Union
+from chargelazy import lazy_import
+from chargepools import BrowserPool, DriverSessionMixin
+from chargetraces import TracedMixin
+
+# Heavy dependencies are imported on first use, so importing this module is cheap
+By = lazy_import('selenium.webdriver.common.by', 'By')
+EC = lazy_import('selenium.webdriver.support.expected_conditions')
+get_shared_encoder = lazy_import('chargeencoders', 'get_shared_encoder')
+optimize_for_cpu = lazy_import('chargeencoders', 'optimize_for_cpu')
+IncrementalRecognizer = lazy_import('chargeframes', 'IncrementalRecognizer')
+diff_elements = lazy_import('chargeframes', 'diff_elements')
+Image = lazy_import('PIL.Image')
+torch = lazy_import('torch')
+transforms = lazy_import('torchvision.transforms')
+resnet18 = lazy_import('torchvision.models', 'resnet18')
+
+# A screenshot can be a file path, PNG bytes from the driver, or an already decoded PIL image
+Screenshot = Union[str, bytes, 'Image.Image']
+
+
+def pad_to_square(image: Image.Image) -> Image.Image:
+    """
+    Pad an image with black on the right or bottom to a square, so resizing
+    keeps all of it (a wide region crop would mostly be cut off by a center
+    crop) and positions only scale.
+    """
+    width, height = image.size
+    if width == height:
+        return image
+    square = Image.new(image.mode, (max(width, height),) * 2)
+    square.paste(image, (0, 0))
+    return square
+
+class ChargeAssistant(DriverSessionMixin, TracedMixin):
+    # Payment page; override per class or instance, e.g. to point at a test server
+    payment_url = "example.com/payment"
+
+    def __init__(self, pool: Optional[BrowserPool] = None, optimized: bool = False,
+                 num_threads: Optional[int] = None):
+        # NLP Model, shared by every agent in the process and loaded on first use.
+        # optimized=True switches both models to the int8 CPU inference path.
+        self.encoder = get_shared_encoder("bert-base-uncased", optimized=optimized, num_threads=num_threads)
         
         # CV Model for UI recognition
         self.cv_model = resnet18(pretrained=True)
         self.cv_model.fc = torch.nn.Linear(512, 100)  # Example: 100 different UI elements
         self.cv_model.eval()
+        if optimized:
+            # Only the classifier head is a Linear layer; the convolutions stay fp32
+            self.cv_model = optimize_for_cpu(self.cv_model, num_threads)
+
+        # Preprocessing is built once and reused for every frame and region crop
+        self.preprocess = transforms.Compose([
+            transforms.Lambda(pad_to_square),
+            transforms.Resize((224, 224)),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+        ])
+
+        # Re-runs the CV model only on the parts of a frame that changed since the last one
+        self.recognizer = IncrementalRecognizer(self.screenshots_to_elements)
         
         # Web driver for browser automation
-        self.driver = webdriver.Chrome()
-        self.wait = WebDriverWait(self.driver, 10)
+        self._init_driver(pool)
 
     def understand_language(self, text: str) -> Dict[str, Any]:
         """
         Process the given text to understand language context and intent related to charging/payment.
+        Repeated instructions are answered from the encoder's intent cache.
+        """
+        return self.encoder.understand(text, self._interpret_language, namespace='ChargeAssistant')
+
+    def _interpret_language(self, embedding) -> Dict[str, Any]:
         """
-        inputs = self.tokenizer(text, return_tensors="pt")
-        outputs = self.nlp_model(**inputs)
-        # Here, you would interpret the model outputs for context and intent related to payment/charge
+        Derive context and intent from the encoded instruction.
+        """
+        # Here, you would interpret the embedding for context and intent related to payment/charge
         return {
             'context': "Charge Interaction",
             'intent': "Find and proceed with payment",
             'entities': {'button_text': 'Pay Now'}
         }
 
-    def screenshot_to_elements(self, screenshot_path: str) -> List[Dict[str, Any]]:
+    def capture_screenshot(self) -> Image.Image:
         """
-        Use computer vision to detect UI elements from a screenshot related to charge/payment.
+        Take a screenshot of the current page and decode it in memory,
+        without writing a file.
         """
-        image = Image.open(screenshot_path).convert('RGB')
-        transform = transforms.Compose([
-            transforms.Resize(256),
-            transforms.CenterCrop(224),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
-        ])
-        image_tensor = transform(image).unsqueeze(0)
-        
-        with torch.no_grad():
-            features = self.cv_model(image_tensor)
-        
+        return self._to_image(self.driver.get_screenshot_as_png())
+
+    def _to_image(self, screenshot: Screenshot) -> Image.Image:
+        if isinstance(screenshot, bytes):
+            screenshot = Image.open(io.BytesIO(screenshot))
+        elif isinstance(screenshot, str):
+            screenshot = Image.open(screenshot)
+        return screenshot.convert('RGB')
+
+    def screenshots_to_tensor(self, screenshots: List[Screenshot]) -> torch.Tensor:
+        """
+        Preprocess screenshots into one (n, 3, 224, 224) batch tensor.
+        """
+        return torch.stack([self.preprocess(self._to_image(screenshot)) for screenshot in screenshots])
+
+    def screenshots_to_elements(self, screenshots: List[Screenshot]) -> List[List[Dict[str, Any]]]:
+        """
+        Detect UI elements in many screenshots with a single forward pass of
+        the CV model. Returns one element list per screenshot, in order.
+        """
+        if not screenshots:
+            return []
+        with torch.inference_mode():
+            features = self.cv_model(self.screenshots_to_tensor(screenshots))
+        return [self._features_to_elements(frame_features) for frame_features in features]
+
+    def _features_to_elements(self, features: torch.Tensor) -> List[Dict[str, Any]]:
         # Here, you would map features to UI elements, this is a placeholder
         return [{'type': 'button', 'text': 'Pay Now', 'bounds': [10, 10, 50, 30]}]
 
+    def screenshot_to_elements(self, screenshot: Screenshot) -> List[Dict[str, Any]]:
+        """
+        Use computer vision to detect UI elements from a screenshot related to charge/payment.
+        """
+        return self.screenshots_to_elements([screenshot])[0]
+
+    def recognize_frame(self, screenshot: Screenshot) -> List[Dict[str, Any]]:
+        """
+        Detect UI elements in the next frame of this session, reusing the
+        previous frame's results for every region that did not change.
+        """
+        return self.recognizer.update(self._to_image(screenshot))
+
     def interpret_ui(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Interpret UI design based on detected elements relevant to charge/payment.
@@ -72,12 +146,10 @@ class ChargeAssistant:
     def detect_dynamic_changes(self, previous_elements: List[Dict[str, Any]], new_elements: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Detect changes in UI elements related to charge/payment to understand dynamic content.
+        Elements are matched by type, text and overlapping bounds; inserted elements
+        have 'old' set to None and removed ones have 'new' set to None.
         """
-        changes = []
-        for old, new in zip(previous_elements, new_elements):
-            if old != new:
-                changes.append({'old': old, 'new': new})
-        return changes
+        return diff_elements(previous_elements, new_elements)
 
     def perform_action(self, action: Dict[str, Any]):
         """
@@ -94,34 +166,47 @@ class ChargeAssistant:
         """
         Execute a charge-related task by interpreting language, recognizing UI, and acting accordingly.
         """
-        context = self.understand_language(task_description)
-        
-        self.driver.get("example.com/payment")  # Example payment URL
-        screenshot_path = "current_page.png"
-        self.driver.save_screenshot(screenshot_path)
-        
-        elements = self.screenshot_to_elements(screenshot_path)
-        ui_design = self.interpret_ui(elements)
-        
-        # Pretend we took another screenshot after some action
-        self.driver.save_screenshot("after_action.png")
-        new_elements = self.screenshot_to_elements("after_action.png")
-        dynamic_changes = self.detect_dynamic_changes(elements, new_elements)
-
-        # Example action based on understanding of charge/payment
-        if context['intent'] == "Find and proceed with payment":
-            for elem in ui_design['interactive_elements']:
-                if elem['text'] == 'Pay Now':
-                    self.perform_action({'type': 'click', 'text': 'Pay Now'})
-                    break
-        
-        # Handle dynamic changes if necessary
-        if dynamic_changes:
-            print(f"Detected dynamic changes: {dynamic_changes}")
+        trace = self.trace
+        with trace.span('ChargeAssistant.execute_task'), self.driver_session():
+            with trace.span('ChargeAssistant.understand'):
+                context = self.understand_language(task_description)
+            
+            with trace.span('ChargeAssistant.browser'):
+                self._open_driver()
+            with trace.span('ChargeAssistant.navigate'):
+                self.driver.get(self.payment_url)
+            # A new page starts a new frame sequence
+            self.recognizer.reset()
+            with trace.span('ChargeAssistant.screenshot'):
+                screenshot = self.capture_screenshot()
+            with trace.span('ChargeAssistant.recognize'):
+                elements = self.recognize_frame(screenshot)
+            ui_design = self.interpret_ui(elements)
+            
+            # Pretend we took another screenshot after some action; only changed regions are recognized again
+            with trace.span('ChargeAssistant.screenshot'):
+                screenshot = self.capture_screenshot()
+            with trace.span('ChargeAssistant.recognize'):
+                new_elements = self.recognize_frame(screenshot)
+            with trace.span('ChargeAssistant.diff'):
+                dynamic_changes = self.detect_dynamic_changes(elements, new_elements)
+
+            # Example action based on understanding of charge/payment
+            if context['intent'] == "Find and proceed with payment":
+                for elem in ui_design['interactive_elements']:
+                    if elem['text'] == 'Pay Now':
+                        with trace.span('ChargeAssistant.perform', action='click'):
+                            self.perform_action({'type': 'click', 'text': 'Pay Now'})
+                        break
+            
+            # Handle dynamic changes if necessary
+            if dynamic_changes:
+                trace.count('dynamic_changes', len(dynamic_changes), agent='ChargeAssistant')
+                print(f"Detected dynamic changes: {dynamic_changes}")
 
-        print("Task execution completed.")
-        self.driver.quit()
+            print("Task execution completed.")
 
-# Example usage
-charge_assistant = ChargeAssistant()
-charge_assistant.execute_task("Find and proceed with payment on the page")
+# Example usage (see chargecli.py for the command line entry point)
+if __name__ == "__main__":
+    charge_assistant = ChargeAssistant()
+    charge_assistant.execute_task("Find and proceed with payment on the page")
@@ -0,0 +1,108 @@
+import os
+import re
+import tempfile
+from typing import List, Dict, Any, Optional, Tuple
+import joblib
+
+VERSION_PATTERN = re.compile(r'^model-(\d+)\.joblib$')
+
+
+def memory_usage() -> Dict[str, int]:
+    """
+    Return this process's resident (rss) and proportional (pss) memory in
+    bytes. PSS splits shared pages between the processes mapping them, so
+    it shows what memory-mapped models save. Only rss is reported where
+    /proc is unavailable.
+    """
+    usage = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                key, value = line.split(':', 1)
+                if key in ('Rss', 'Pss'):
+                    usage[key.lower()] = int(value.split()[0]) * 1024
+    except (OSError, ValueError):
+        import resource
+        usage['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
+
+
+class ModelRegistry:
+    def __init__(self, root: str = 'charge_models'):
+        """
+        Versioned model artifacts under root.
+
+        Each save writes the artifact to a temporary file and then links it
+        into place as the next model-NNNNNN.joblib, so readers never see a
+        partial file and the newest version is simply the highest number.
+        Artifacts are stored uncompressed so load() can memory-map their
+        arrays, which only makes loading faster: scikit-learn trees copy
+        their node and value arrays into private memory as they are
+        unpickled, so every process that loads a forest holds its own copy.
+        To share one model's memory between workers, load it in the parent
+        with ChargeSystem.preload_model() and fork the workers afterwards.
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, version: int) -> str:
+        return os.path.join(self.root, f"model-{version:06d}.joblib")
+
+    def versions(self) -> List[int]:
+        """
+        Return every stored version, oldest first.
+        """
+        return sorted(int(m.group(1)) for m in map(VERSION_PATTERN.match, os.listdir(self.root)) if m)
+
+    def latest_version(self) -> Optional[int]:
+        """
+        Return the newest version, or None if nothing was saved yet.
+        """
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def save(self, model: Any, schema: Any = None) -> int:
+        """
+        Store model (and its feature schema) as a new version.
+        Returns the new version number.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                joblib.dump({'model': model, 'schema': schema}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            versions = self.versions()
+            version = (versions[-1] if versions else 0) + 1
+            while True:
+                try:
+                    # link() fails if the name exists, so concurrent savers never share a version
+                    os.link(tmp_path, self._path(version))
+                    break
+                except FileExistsError:
+                    version += 1
+        finally:
+            os.unlink(tmp_path)
+        return version
+
+    def load(self, version: Optional[int] = None, mmap: bool = True) -> Tuple[Any, Any, int]:
+        """
+        Load a version (the newest by default) and return (model, schema, version).
+        With mmap, arrays are read from a memory map of the file; those
+        that unpickling copies, such as a forest's trees, end up private.
+        """
+        if version is None:
+            version = self.latest_version()
+            if version is None:
+                raise FileNotFoundError(f"No model saved in {self.root}.")
+        artifact = joblib.load(self._path(version), mmap_mode='r' if mmap else None)
+        return artifact['model'], artifact['schema'], version
+
+    def prune(self, keep: int = 5):
+        """
+        Delete all but the newest keep versions (at least one is kept).
+        Processes that already mapped a deleted file keep using it.
+        """
+        for version in self.versions()[:-max(1, keep)]:
+            os.unlink(self._path(version))
+
@@ -0,0 +1,163 @@
+from operator import itemgetter
+from typing import List, Dict, Any, Optional
+import numpy as np
+from chargegeo import StationIndex, haversine_km, station_coordinates
+
+# Stations this far from preferred_coords or further get no proximity bonus
+DEFAULT_PROXIMITY_RADIUS_KM = 25.0
+
+def score_station(user_preferences: Dict[str, Any], station: Dict[str, Any]) -> float:
+    """
+    Score a single station. This is the reference rule set; StationScorer
+    applies the same rules to whole columns at once.
+    """
+    score = 0
+    # Price
+    if user_preferences.get('max_price', float('inf')) > station['price']:
+        score += 1
+    else:
+        score -= 1  # Penalize if over budget
+
+    # Charging Speed
+    if user_preferences.get('min_speed', 0) < station['charging_speed']:
+        score += 1
+    else:
+        score -= 1  # Penalize if speed is insufficient
+
+    # Availability Time
+    preferred_time = user_preferences.get('preferred_time', None)
+    if preferred_time:
+        time_diff = abs(station['available_time'] - preferred_time)
+        score -= time_diff / 3600  # Penalty for time difference in hours
+
+    # Proximity: with preferred_coords and station coordinates, a bonus
+    # that falls from 1 at the preferred point to 0 at the proximity radius
+    preferred_coords = user_preferences.get('preferred_coords')
+    if preferred_coords is not None and 'latitude' in station and 'longitude' in station:
+        radius_km = user_preferences.get('proximity_radius_km', DEFAULT_PROXIMITY_RADIUS_KM)
+        distance = haversine_km(preferred_coords[0], preferred_coords[1], station['latitude'], station['longitude'])
+        score += max(0.0, 1 - float(distance) / radius_km)
+    elif user_preferences.get('preferred_location') == station['location']:
+        score += 1
+
+    return score
+
+
+def stations_to_columns(stations: List[Dict[str, Any]], coordinates: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Convert a list of station dicts into columnar NumPy arrays. With
+    coordinates, 'latitude' and 'longitude' columns are included (NaN
+    where a station has none).
+    """
+    count = len(stations)
+    columns = {
+        'price': np.fromiter(map(itemgetter('price'), stations), dtype=np.float64, count=count),
+        'charging_speed': np.fromiter(map(itemgetter('charging_speed'), stations), dtype=np.float64, count=count),
+        'available_time': np.fromiter(map(itemgetter('available_time'), stations), dtype=np.float64, count=count),
+        'location': np.array(list(map(itemgetter('location'), stations)), dtype=object),
+    }
+    if coordinates:
+        columns['latitude'], columns['longitude'] = station_coordinates(stations)
+    return columns
+
+
+class StationScorer:
+    def __init__(self, user_preferences: Dict[str, Any]):
+        # Preferences are read once here rather than once per station
+        self.max_price = user_preferences.get('max_price', float('inf'))
+        self.min_speed = user_preferences.get('min_speed', 0)
+        self.preferred_time = user_preferences.get('preferred_time', None)
+        self.preferred_location = user_preferences.get('preferred_location')
+        self.preferred_coords = user_preferences.get('preferred_coords')
+        self.proximity_radius_km = user_preferences.get('proximity_radius_km', DEFAULT_PROXIMITY_RADIUS_KM)
+
+    def score_columns(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Score every station in one batched pass. Gives the same scores as
+        score_station.
+        """
+        # Price: +1 within budget, -1 otherwise
+        scores = np.where(self.max_price > columns['price'], 1.0, -1.0)
+
+        # Charging Speed: +1 if fast enough, -1 otherwise
+        scores += np.where(self.min_speed < columns['charging_speed'], 1.0, -1.0)
+
+        # Availability Time: penalty for time difference in hours
+        if self.preferred_time:
+            scores -= np.abs(columns['available_time'] - self.preferred_time) / 3600
+
+        # Proximity
+        same_location = columns['location'] == self.preferred_location
+        if self.preferred_coords is None:
+            scores += same_location
+        else:
+            distances = haversine_km(self.preferred_coords[0], self.preferred_coords[1],
+                                     columns['latitude'], columns['longitude'])
+            # Stations without coordinates fall back to the location name
+            scores += np.where(np.isnan(distances), same_location,
+                               np.maximum(0.0, 1 - distances / self.proximity_radius_km))
+        return scores
+
+    def score(self, stations: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Score a list of station dicts.
+        """
+        # Coordinates are only read when they affect the score
+        return self.score_columns(stations_to_columns(stations, coordinates=self.preferred_coords is not None))
+
+    def top_k_indices(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Return the indices of the k best scores, best first. Uses partial
+        selection so only the k winners are sorted. Ties keep list order,
+        matching a stable sort.
+        """
+        n = scores.shape[0]
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < n:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            # argpartition breaks ties arbitrarily, so pull in every station
+            # that ties with the k-th score before ordering
+            kth_score = scores[candidates].min()
+            candidates = np.flatnonzero(scores >= kth_score)
+        else:
+            candidates = np.arange(n)
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order[:k]]
+
+    def top_k_nearby(self, stations: List[Dict[str, Any]], index: StationIndex, k: int,
+                     radius_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Return the k best stations within radius_km of preferred_coords
+        (proximity_radius_km by default), best first. index must be built
+        from stations; only the stations it finds nearby are scored.
+        """
+        if self.preferred_coords is None:
+            raise ValueError("top_k_nearby needs preferred_coords in the user preferences.")
+        if radius_km is None:
+            radius_km = self.proximity_radius_km
+        candidates, _ = index.within(self.preferred_coords[0], self.preferred_coords[1], radius_km)
+        # Score candidates in list order so ties still follow it
+        candidates = np.sort(candidates)
+        nearby = [stations[i] for i in candidates]
+        if not nearby:
+            return []
+        return [nearby[i] for i in self.top_k_indices(self.score(nearby), k)]
+
+    def best(self, stations: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Return the best scoring station, or None for an empty list.
+        """
+        if not stations:
+            return None
+        # argmax returns the first maximum, matching the stable sort it replaces
+        return stations[int(np.argmax(self.score(stations)))]
+
+    def top_k(self, stations: List[Dict[str, Any]], k: int) -> List[Dict[str, Any]]:
+        """
+        Return the k best scoring stations, best first.
+        """
+        if not stations:
+            return []
+        return [stations[i] for i in self.top_k_indices(self.score(stations), k)]
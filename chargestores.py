@@ -0,0 +1,183 @@
+import json
+import os
+import time
+from typing import Dict, Any, Optional, Iterator
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_COLUMN = '_timestamp'
+
+
+class InteractionStore:
+    def __init__(self, directory: str = 'charge_interactions', schema: Optional[Dict[str, str]] = None,
+                 chunk_rows: int = 4096):
+        """
+        Append-only columnar store for logged interactions.
+
+        Each column is a raw file of one fixed dtype under directory, plus a
+        timestamp column for windowed reads. Appends are buffered into
+        chunks of chunk_rows and written together; reads memory-map the
+        column files, so no per-row Python objects are kept.
+        The schema (column name -> NumPy dtype) is inferred from the first
+        interaction unless given: numbers are stored as float64 and booleans
+        as bool, so a field logged as 1 first can still hold 1.5 later.
+        Values a given integer or boolean column cannot hold exactly are
+        rejected rather than truncated.
+        """
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        os.makedirs(directory, exist_ok=True)
+        self._schema_path = os.path.join(directory, 'schema.json')
+        self.schema = None
+        self._rows = 0
+        if os.path.exists(self._schema_path):
+            with open(self._schema_path) as f:
+                self._set_schema(json.load(f))
+            self._recover()
+        elif schema is not None:
+            self._set_schema(dict(schema))
+
+    def _set_schema(self, schema: Dict[str, str]):
+        schema.setdefault(TIMESTAMP_COLUMN, 'float64')
+        self.schema = schema
+        self._dtypes = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        self._buffer = {name: np.empty(self.chunk_rows, dtype=dtype) for name, dtype in self._dtypes.items()}
+        self._buffered = 0
+        if not os.path.exists(self._schema_path):
+            tmp_path = self._schema_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(schema, f)
+            os.replace(tmp_path, self._schema_path)
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.col")
+
+    def _recover(self):
+        """
+        Count stored rows, trimming any partially written trailing chunk so
+        every column has the same length. A missing floating-point column
+        file is rebuilt with NaN; any other missing column is an error, as
+        the stored rows cannot be recovered without it.
+        """
+        sizes = {}
+        for name, dtype in self._dtypes.items():
+            path = self._column_path(name)
+            if os.path.exists(path):
+                sizes[name] = os.path.getsize(path) // dtype.itemsize
+        self._rows = min(sizes.values(), default=0)
+        missing = [name for name in self._dtypes if name not in sizes]
+        if self._rows:
+            lost = [name for name in missing if self._dtypes[name].kind != 'f']
+            if lost:
+                raise ValueError(f"Column files missing from {self.directory}: {sorted(lost)}")
+        for name in missing:
+            with open(self._column_path(name), 'wb') as f:
+                f.write(np.full(self._rows, np.nan, dtype=self._dtypes[name]).tobytes())
+        for name, rows in sizes.items():
+            if rows != self._rows:
+                with open(self._column_path(name), 'ab') as f:
+                    f.truncate(self._rows * self._dtypes[name].itemsize)
+
+    @staticmethod
+    def _infer_dtype(value: Any) -> str:
+        if isinstance(value, (bool, np.bool_)):
+            return 'bool'
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return 'float64'
+        raise TypeError(f"Cannot store non-numeric interaction value {value!r}.")
+
+    def append(self, interaction: Dict[str, Any], timestamp: Optional[float] = None):
+        """
+        Append one interaction. Missing floating-point fields are stored as NaN.
+        """
+        if self.schema is None:
+            self._set_schema({name: self._infer_dtype(value) for name, value in interaction.items()})
+        unknown = interaction.keys() - self._dtypes.keys()
+        if unknown:
+            raise ValueError(f"Interaction has fields not in the store schema: {sorted(unknown)}")
+
+        row = self._buffered
+        for name, column in self._buffer.items():
+            if name == TIMESTAMP_COLUMN:
+                column[row] = time.time() if timestamp is None else timestamp
+            elif name in interaction:
+                value = interaction[name]
+                column[row] = value
+                if column.dtype.kind != 'f' and column[row] != value:
+                    raise ValueError(f"Field '{name}' value {value!r} does not fit the store's "
+                                     f"{column.dtype} column.")
+            elif column.dtype.kind == 'f':
+                column[row] = np.nan
+            else:
+                raise ValueError(f"Interaction is missing required field '{name}'.")
+        self._buffered += 1
+        if self._buffered == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered rows to the column files.
+        """
+        if not self._buffered:
+            return
+        for name, column in self._buffer.items():
+            with open(self._column_path(name), 'ab') as f:
+                f.write(column[:self._buffered].tobytes())
+        self._rows += self._buffered
+        self._buffered = 0
+
+    def __len__(self) -> int:
+        return self._rows + (self._buffered if self.schema is not None else 0)
+
+    def columns(self, since: Optional[float] = None, until: Optional[float] = None,
+                include_timestamp: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Return read-only memory-mapped columns, optionally restricted to rows
+        logged in [since, until). Timestamps are assumed to be appended in
+        non-decreasing order.
+        """
+        self.flush()
+        if self.schema is None or not self._rows:
+            return {}
+        mapped = {
+            name: np.memmap(self._column_path(name), dtype=dtype, mode='r', shape=(self._rows,))
+            for name, dtype in self._dtypes.items()
+        }
+        timestamps = mapped[TIMESTAMP_COLUMN]
+        start = 0 if since is None else int(np.searchsorted(timestamps, since, side='left'))
+        stop = self._rows if until is None else int(np.searchsorted(timestamps, until, side='left'))
+        return {
+            name: column[start:stop]
+            for name, column in mapped.items()
+            if include_timestamp or name != TIMESTAMP_COLUMN
+        }
+
+    def to_frame(self, since: Optional[float] = None, until: Optional[float] = None) -> pd.DataFrame:
+        """
+        Return the (windowed) store as a DataFrame.
+        """
+        return pd.DataFrame(self.columns(since, until), copy=False)
+
+    def iter_frames(self, chunk_rows: int = 65536, since: Optional[float] = None,
+                    until: Optional[float] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the (windowed) store as DataFrames of at most chunk_rows rows.
+        """
+        columns = self.columns(since, until)
+        rows = len(next(iter(columns.values()))) if columns else 0
+        for start in range(0, rows, chunk_rows):
+            yield pd.DataFrame({name: column[start:start + chunk_rows] for name, column in columns.items()}, copy=False)
+
+    def count_until(self, timestamp: float) -> int:
+        """
+        Return how many interactions were logged at or before timestamp.
+        """
+        timestamps = self.columns(include_timestamp=True).get(TIMESTAMP_COLUMN)
+        return 0 if timestamps is None else int(np.searchsorted(timestamps, timestamp, side='right'))
+
+    def last_timestamp(self) -> Optional[float]:
+        """
+        Return the timestamp of the most recent interaction, if any.
+        """
+        timestamps = self.columns(include_timestamp=True).get(TIMESTAMP_COLUMN)
+        return float(timestamps[-1]) if timestamps is not None and len(timestamps) else None
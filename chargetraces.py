@@ -0,0 +1,274 @@
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+
+
+class MemorySink:
+    """
+    Keeps every record in a list, e.g. for tests and benchmarks.
+    """
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            self.records.append(record)
+
+    def spans(self, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [r for r in self.records if r['type'] == 'span' and (name is None or r['name'] == name)]
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonLinesSink:
+    """
+    Appends one JSON object per span or counter record to path.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a')
+        self._lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]):
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_label_value(value)}"' for key, value in labels) + '}'
+
+
+class PrometheusSink:
+    """
+    Aggregates records and writes them to path in the Prometheus text
+    exposition format on flush (e.g. for a node exporter's textfile
+    collector). Spans become a charge_span_duration_seconds summary
+    (count and sum) plus charge_span_errors_total, labelled by span name;
+    counters become charge_<name>_total, labelled by their labels.
+    """
+    def __init__(self, path: str, prefix: str = 'charge'):
+        self.path = path
+        self.prefix = prefix
+        self._span_count = defaultdict(int)
+        self._span_sum = defaultdict(float)
+        self._span_errors = defaultdict(int)
+        self._counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            if record['type'] == 'span':
+                self._span_count[record['name']] += 1
+                self._span_sum[record['name']] += record['duration']
+                self._span_errors[record['name']] += record['status'] == 'error'
+            else:
+                labels = tuple(sorted(record['labels'].items()))
+                self._counters[(record['name'], labels)] += record['value']
+
+    def render(self) -> str:
+        with self._lock:
+            lines = []
+            if self._span_count:
+                metric = f"{self.prefix}_span_duration_seconds"
+                lines.append(f"# TYPE {metric} summary")
+                for name in sorted(self._span_count):
+                    labels = _label_text((('span', name),))
+                    lines.append(f"{metric}_count{labels} {self._span_count[name]}")
+                    lines.append(f"{metric}_sum{labels} {self._span_sum[name]:.6f}")
+                metric = f"{self.prefix}_span_errors_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.extend(f"{metric}{_label_text((('span', name),))} {self._span_errors[name]}"
+                             for name in sorted(self._span_errors))
+            declared = set()
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{self.prefix}_{_metric_name(name)}_total"
+                if metric not in declared:
+                    declared.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric}{_label_text(labels)} {value:g}")
+            return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        # Write atomically so scrapers never read a partial file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+    def close(self):
+        self.flush()
+
+
+class Span:
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """
+        Add attributes to the span, e.g. results only known at the end.
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        stack = self.tracer._stack()
+        self.parent_id = stack[-1].span_id if stack else None
+        self.trace_id = stack[0].span_id if stack else None
+        self.span_id = next(self.tracer._ids)
+        if self.trace_id is None:
+            self.trace_id = self.span_id
+        stack.append(self)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = time.perf_counter() - self._start
+        self.tracer._stack().pop()
+        if exc_type is not None:
+            self.attributes['error'] = f"{exc_type.__name__}: {exc_value}"
+        self.tracer._emit({
+            'type': 'span', 'name': self.name, 'trace_id': self.trace_id, 'span_id': self.span_id,
+            'parent_id': self.parent_id, 'start': self.started_at, 'duration': duration,
+            'status': 'error' if exc_type is not None else 'ok', 'attributes': self.attributes
+        })
+        return False
+
+
+class Tracer:
+    def __init__(self, sinks: Optional[List[Any]] = None):
+        """
+        Records spans (timed, nested stages) and counters and passes each
+        record to every sink. A sink is any object with emit(record),
+        flush() and close(); see MemorySink, JsonLinesSink and
+        PrometheusSink.
+        """
+        self.sinks = list(sinks or [])
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _emit(self, record: Dict[str, Any]):
+        for sink in self.sinks:
+            sink.emit(record)
+
+    def span(self, name: str, **attributes) -> Span:
+        """
+        Time a stage: `with tracer.span('ChargeManager.parse'):`. Spans
+        opened inside another span on the same thread become its children.
+        """
+        return Span(self, name, attributes)
+
+    def count(self, name: str, value: float = 1, **labels):
+        """
+        Add value to the counter name (per distinct set of labels).
+        """
+        self._emit({'type': 'counter', 'name': name, 'value': value, 'labels': labels, 'time': time.time()})
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+class _NullSpan:
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """
+    The default tracer: every call is a no-op and span() returns one shared
+    object, so instrumented code costs next to nothing when tracing is off.
+    """
+    sinks = []
+
+    def span(self, name: str, **attributes) -> _NullSpan:
+        return _NULL_SPAN
+
+    def count(self, name: str, value: float = 1, **labels):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_tracer = NullTracer()
+
+
+def get_tracer():
+    """
+    Return the process-wide tracer (a NullTracer unless set_tracer was called).
+    """
+    return _tracer
+
+
+def set_tracer(tracer):
+    """
+    Install tracer process-wide; pass None to turn tracing off again.
+    """
+    global _tracer
+    _tracer = tracer if tracer is not None else NullTracer()
+
+
+class TracedMixin:
+    """
+    Gives an agent a `trace` tracer: its own `tracer` when one is set on the
+    class or instance, otherwise the process-wide one.
+    """
+    tracer = None
+
+    @property
+    def trace(self):
+        return self.tracer if self.tracer is not None else _tracer
@@ -0,0 +1,291 @@
+from __future__ import annotations
+import collections
+import multiprocessing
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from chargelazy import lazy_import
+
+np = lazy_import('numpy')
+RandomForestRegressor = lazy_import('sklearn.ensemble', 'RandomForestRegressor')
+FeatureSchema = lazy_import('chargepredicts', 'FeatureSchema')
+
+
+class TrainingPolicy:
+    def __init__(self, every_n: Optional[int] = None, interval: Optional[float] = None,
+                 drift_threshold: Optional[float] = None, drift_window: int = 200):
+        """
+        When a BackgroundTrainer refits; a fit starts as soon as any set rule fires:
+
+        every_n          after every_n interactions logged since the last fit
+        interval         interval seconds after the last fit
+        drift_threshold  when the mean of a feature over the last drift_window
+                         interactions is more than drift_threshold training
+                         standard deviations from its mean in the data the
+                         installed model was fitted on
+        """
+        if every_n is None and interval is None and drift_threshold is None:
+            raise ValueError("A training policy needs every_n, interval or drift_threshold.")
+        self.every_n = every_n
+        self.interval = interval
+        self.drift_threshold = drift_threshold
+        self.drift_window = drift_window
+
+
+def fit_forest(X: np.ndarray, y: np.ndarray, params: Dict[str, Any]) -> RandomForestRegressor:
+    """
+    Fit a fresh forest with params; run in the trainer's worker process.
+    """
+    return RandomForestRegressor(**params).fit(X, y)
+
+
+def mean_absolute_error(predictions: np.ndarray, y: np.ndarray) -> float:
+    return float(np.mean(np.abs(predictions - y)))
+
+
+class BackgroundTrainer:
+    def __init__(self, system, policy: Optional[TrainingPolicy] = None, holdout: float = 0.2,
+                 tolerance: float = 0.0, min_rows: int = 20, processes: bool = True, save: bool = True,
+                 check_interval: float = 1.0):
+        """
+        Refits a ChargeSystem's model off the prediction path.
+
+        A coordinator thread waits for policy (default: every 100
+        interactions) to fire, takes a snapshot of the interaction data and
+        fits a new forest on all but the newest holdout fraction of it in a
+        separate process (a thread with processes=False). The candidate is
+        installed only if its mean absolute error on the holdout rows is at
+        most (1 + tolerance) times the installed model's, and then saved
+        with system.save_model() when save is set. Both are compared only on
+        holdout rows newer than the installed model's training data; when
+        there are none (e.g. a model loaded from disk next to a store), the
+        comparison is skipped and the candidate installed. Installing
+        replaces the system's (model, schema) pair in one assignment, so
+        predictions never wait and never see half of a swap. Snapshots with fewer than
+        min_rows labelled rows are skipped. check_interval is how often the
+        interval and drift rules are checked, in seconds. The worker process
+        is spawned, so scripts using it need an `if __name__ == '__main__':`
+        guard.
+        """
+        if not 0 < holdout < 1:
+            raise ValueError("holdout must be between 0 and 1.")
+        self.system = system
+        self.policy = policy or TrainingPolicy(every_n=100)
+        self.holdout = holdout
+        self.tolerance = tolerance
+        self.min_rows = min_rows
+        self.save = save
+        self.check_interval = check_interval
+        self.stats = {'trainings': 0, 'accepted': 0, 'rejected': 0, 'failures': 0, 'skipped': 0, 'last': None}
+        # Interactions observed in total and at the last snapshot
+        self._seen = 0
+        self._seen_at_fit = 0
+        self._fitted_at = time.monotonic()
+        # Recent interactions and (columns, mean, std) of the installed model's training data, for drift
+        self._window = collections.deque(maxlen=self.policy.drift_window)
+        self._feature_stats = None
+        # The last model this trainer installed and how many snapshot rows precede its holdout
+        self._installed = (None, 0)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._forced = False
+        self._closed = False
+        if processes:
+            # Spawned rather than forked: forking a process with running threads can deadlock the child
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='charge-fit')
+        self._thread = threading.Thread(target=self._run, name='charge-background-trainer', daemon=True)
+        self._thread.start()
+
+    def observe(self, interaction: Dict[str, Any]):
+        """
+        Count a logged interaction; called by ChargeSystem.log_interaction.
+        """
+        with self._lock:
+            self._seen += 1
+            if self.policy.drift_threshold is not None:
+                self._window.append(interaction)
+        if self.policy.every_n is not None and self._seen - self._seen_at_fit >= self.policy.every_n:
+            self._wake.set()
+
+    def trigger(self):
+        """
+        Start a fit now, regardless of the policy.
+        """
+        self._forced = True
+        self._wake.set()
+
+    def drift(self) -> Optional[float]:
+        """
+        Largest shift of a feature's recent mean from its training mean, in
+        training standard deviations; None until the window is full and a
+        model fitted by this trainer is installed.
+        """
+        with self._lock:
+            if self._feature_stats is None or len(self._window) < self._window.maxlen:
+                return None
+            recent = list(self._window)
+        columns, mean, std = self._feature_stats
+        values = np.array([[row.get(column, np.nan) for column in columns] for row in recent], dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # Features missing from every recent row
+            shift = np.abs(np.nanmean(values, axis=0) - mean) / np.where(std > 0, std, 1.0)
+        return None if np.isnan(shift).all() else float(np.nanmax(shift))
+
+    def _due(self) -> Optional[str]:
+        """
+        Return the reason to fit now, if there is one.
+        """
+        policy = self.policy
+        if self._forced:
+            self._forced = False
+            return 'manual'
+        new = self._seen - self._seen_at_fit
+        if not new:
+            return None
+        if policy.every_n is not None and new >= policy.every_n:
+            return 'every_n'
+        if policy.interval is not None and time.monotonic() - self._fitted_at >= policy.interval:
+            return 'interval'
+        if policy.drift_threshold is not None:
+            drift = self.drift()
+            if drift is not None and drift > policy.drift_threshold:
+                return 'drift'
+        return None
+
+    def _timeout(self) -> Optional[float]:
+        timeouts = []
+        if self.policy.interval is not None:
+            remaining = self.policy.interval - (time.monotonic() - self._fitted_at)
+            if remaining > 0:
+                timeouts.append(remaining)
+        if self.policy.interval is not None or self.policy.drift_threshold is not None:
+            timeouts.append(self.check_interval)
+        return min(timeouts) if timeouts else None
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._timeout())
+            self._wake.clear()
+            if self._closed:
+                return
+            reason = self._due()
+            if reason is not None:
+                try:
+                    self.train(reason)
+                except Exception as e:
+                    # Keep serving with the installed model; the next trigger tries again
+                    self.stats['failures'] += 1
+                    self.stats['last'] = {'trigger': reason, 'error': f"{type(e).__name__}: {e}"}
+                    print(f"Background training failed: {type(e).__name__}: {e}")
+
+    def _params(self) -> Dict[str, Any]:
+        model = self.system.model
+        params = model.get_params() if isinstance(model, RandomForestRegressor) else {}
+        # A fresh fit at full size, whatever n_estimators incremental updates or pruning left
+        forest_updater = self.system.forest_updater
+        params.update(warm_start=False, n_estimators=forest_updater.full_trees, n_jobs=forest_updater.n_jobs)
+        return params
+
+    def _fitted_rows(self, model) -> Optional[int]:
+        """
+        How many rows, oldest first, model may have been fitted on; None if unknown.
+        """
+        installed, rows = self._installed
+        return rows if model is installed else self.system.trained_rows()
+
+    def _installed_error(self, model, schema, features, y: np.ndarray) -> Optional[float]:
+        """
+        Mean absolute error of model on features, or None if it is not
+        fitted or cannot read them.
+        """
+        if model is None or not hasattr(model, 'estimators_'):
+            return None
+        if schema is not None:
+            if not set(schema.columns) <= set(features.columns):
+                return None
+            X = features[schema.columns].to_numpy(dtype=np.float64)
+        else:
+            X = features.select_dtypes(include=[np.number]).to_numpy(dtype=np.float64)
+        if X.shape[1] != model.n_features_in_:
+            return None
+        return mean_absolute_error(model.predict(X), y)
+
+    def train(self, reason: str = 'manual') -> Optional[bool]:
+        """
+        Fit, validate and maybe install a candidate on a snapshot of the data
+        now, on the calling thread. Returns whether it was installed, or None
+        if the snapshot was too small.
+        """
+        trace = self.system.trace
+        with trace.span('BackgroundTrainer.train', trigger=reason) as span:
+            with trace.span('BackgroundTrainer.snapshot'):
+                with self._lock:
+                    seen = self._seen
+                    self._window.clear()  # Drift is measured on interactions after this snapshot
+                df = self.system.snapshot_data()
+            self._seen_at_fit = seen
+            self._fitted_at = time.monotonic()
+
+            # Rows without an outcome carry no training signal; the index keeps each row's log position
+            if 'outcome' in df.columns:
+                df = df[df['outcome'].notnull()]
+            if 'outcome' not in df.columns or len(df) < self.min_rows:
+                self.stats['skipped'] += 1
+                span.set(rows=len(df), result='skipped')
+                return None
+            features = df.drop(columns=['outcome'])
+            schema = FeatureSchema.from_frame(features)
+            X = features[schema.columns].to_numpy(dtype=np.float64)
+            y = df['outcome'].to_numpy(dtype=np.float64)
+            # Hold out the newest rows: earlier fits never saw them, and they show current behaviour
+            split = len(df) - max(int(len(df) * self.holdout), 1)
+            train_rows, test_rows = np.arange(split), np.arange(split, len(df))
+            positions = df.index.to_numpy()
+
+            self.stats['trainings'] += 1
+            start = time.perf_counter()
+            with trace.span('BackgroundTrainer.fit', rows=len(train_rows)):
+                model = self._executor.submit(fit_forest, X[train_rows], y[train_rows], self._params()).result()
+            fit_seconds = time.perf_counter() - start
+
+            with trace.span('BackgroundTrainer.validate', rows=len(test_rows)):
+                # The installed model would look better than it is on rows it was fitted on,
+                # so it is only compared on the holdout rows newer than its training data
+                installed, installed_schema = self.system.active
+                fitted_rows = self._fitted_rows(installed)
+                fresh = test_rows[positions[test_rows] >= fitted_rows] if fitted_rows is not None else test_rows[:0]
+                installed_error = None
+                if len(fresh):
+                    installed_error = self._installed_error(installed, installed_schema, features.iloc[fresh], y[fresh])
+                compared = fresh if installed_error is not None else test_rows
+                candidate_error = mean_absolute_error(model.predict(X[compared]), y[compared])
+            accepted = installed_error is None or candidate_error <= installed_error * (1 + self.tolerance)
+            if accepted and not self._closed:
+                self.system.install_model(model, schema)
+                self._installed = (model, int(positions[split]))
+                with self._lock:
+                    self._feature_stats = (schema.columns, X[train_rows].mean(axis=0), X[train_rows].std(axis=0))
+                if self.save:
+                    self.system.save_model()
+            self.stats['accepted' if accepted else 'rejected'] += 1
+            self.stats['last'] = {'trigger': reason, 'rows': len(df), 'fit_seconds': fit_seconds,
+                                  'candidate_error': candidate_error, 'installed_error': installed_error,
+                                  'compared_rows': len(compared), 'accepted': accepted}
+            span.set(rows=len(df), result='accepted' if accepted else 'rejected')
+            trace.count('background_trainings', result='accepted' if accepted else 'rejected')
+            return accepted
+
+    def close(self, wait: bool = True):
+        """
+        Stop the coordinator; with wait, let a running fit finish first.
+        A fit still running after close is never installed.
+        """
+        self._closed = True
+        self._wake.set()
+        if wait:
+            self._thread.join()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,300 @@
+import abc
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Tuple
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Counts fetch/XHR requests still in flight. Installed once per page.
+NETWORK_PROBE_SCRIPT = """
+if (window.__chargePending === undefined) {
+    window.__chargePending = 0;
+    var done = function () { window.__chargePending = Math.max(0, window.__chargePending - 1); };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            window.__chargePending++;
+            return fetch.apply(this, arguments).then(
+                function (r) { done(); return r; },
+                function (e) { done(); throw e; });
+        };
+    }
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__chargePending++;
+        this.addEventListener('loadend', done);
+        return send.apply(this, arguments);
+    };
+}
+return [document.readyState, window.__chargePending,
+        performance.getEntriesByType('resource').length];
+"""
+
+# Returns milliseconds since the last DOM mutation. Installed once per page.
+DOM_PROBE_SCRIPT = """
+if (window.__chargeLastMutation === undefined) {
+    window.__chargeLastMutation = performance.now();
+    new MutationObserver(function () { window.__chargeLastMutation = performance.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return performance.now() - window.__chargeLastMutation;
+"""
+
+
+class WaitCondition(abc.ABC):
+    """
+    A readiness condition. Conditions compose with & (all) and | (any), and
+    each may carry its own timeout in seconds.
+    """
+    name = 'condition'
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        # Seconds until the condition may become true, if it can tell
+        self.ready_in = None
+
+    def reset(self):
+        """
+        Forget state from a previous wait.
+        """
+        self.ready_in = None
+
+    @abc.abstractmethod
+    def check(self, driver) -> bool:
+        """
+        Whether the condition holds right now.
+        """
+
+    def poll(self, driver, elapsed: float) -> Optional[bool]:
+        """
+        True when satisfied, False while pending, None once this condition's
+        own timeout has passed without it being satisfied.
+        """
+        try:
+            if self.check(driver):
+                return True
+        except WebDriverException:
+            pass  # Treat transient driver errors (stale elements, navigation) as not ready
+        if self.timeout is not None and elapsed >= self.timeout:
+            return None
+        return False
+
+    def __and__(self, other: 'WaitCondition') -> 'WaitCondition':
+        return AllOf(self, other)
+
+    def __or__(self, other: 'WaitCondition') -> 'WaitCondition':
+        return AnyOf(self, other)
+
+
+class ElementCountStable(WaitCondition):
+    def __init__(self, locator: Tuple[str, str], min_count: int = 1, stable_for: float = 0.3,
+                 timeout: Optional[float] = None):
+        """
+        Satisfied once at least min_count elements match locator and the
+        count has not changed for stable_for seconds.
+        """
+        super().__init__(timeout)
+        self.locator = locator
+        self.min_count = min_count
+        self.stable_for = stable_for
+        self.name = f"element_count_stable({locator[1]})"
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._count = None
+        self._since = None
+
+    def check(self, driver) -> bool:
+        count = len(driver.find_elements(*self.locator))
+        now = time.monotonic()
+        if count != self._count:
+            self._count, self._since = count, now
+        if count < self.min_count:
+            self.ready_in = None
+            return False
+        self.ready_in = max(0.0, self.stable_for - (now - self._since))
+        return self.ready_in == 0.0
+
+
+class NetworkIdle(WaitCondition):
+    name = 'network_idle'
+
+    def __init__(self, idle_for: float = 0.5, timeout: Optional[float] = None):
+        """
+        Satisfied once the document has loaded, no fetch/XHR request is in
+        flight and no new resource has finished for idle_for seconds.
+        """
+        super().__init__(timeout)
+        self.idle_for = idle_for
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self._resources = None
+        self._since = None
+
+    def check(self, driver) -> bool:
+        ready_state, pending, resources = driver.execute_script(NETWORK_PROBE_SCRIPT)
+        now = time.monotonic()
+        if ready_state != 'complete' or pending:
+            self._resources, self._since, self.ready_in = None, None, None
+            return False
+        if resources != self._resources:
+            self._resources, self._since = resources, now
+        self.ready_in = max(0.0, self.idle_for - (now - self._since))
+        return self.ready_in == 0.0
+
+
+class DomQuiescent(WaitCondition):
+    name = 'dom_quiescent'
+
+    def __init__(self, quiet_for: float = 0.2, timeout: Optional[float] = None):
+        """
+        Satisfied once the DOM has not mutated for quiet_for seconds.
+        """
+        super().__init__(timeout)
+        self.quiet_for = quiet_for
+
+    def check(self, driver) -> bool:
+        quiet = driver.execute_script(DOM_PROBE_SCRIPT) / 1000
+        self.ready_in = max(0.0, self.quiet_for - quiet)
+        return self.ready_in == 0.0
+
+
+class Predicate(WaitCondition):
+    def __init__(self, predicate: Callable[[Any], Any], name: str = 'predicate', timeout: Optional[float] = None):
+        """
+        Satisfied once predicate(driver) returns a truthy value.
+        """
+        super().__init__(timeout)
+        self.predicate = predicate
+        self.name = name
+
+    def check(self, driver) -> bool:
+        return bool(self.predicate(driver))
+
+
+class AllOf(WaitCondition):
+    def __init__(self, *conditions: WaitCondition, timeout: Optional[float] = None):
+        super().__init__(timeout)
+        # Flatten nested AllOf so a & b & c is one level
+        self.conditions = [c for cond in conditions for c in (cond.conditions if isinstance(cond, AllOf) else [cond])]
+        self.name = ' & '.join(c.name for c in self.conditions)
+
+    def check(self, driver) -> bool:
+        return all(condition.check(driver) for condition in self.conditions)
+
+    def reset(self):
+        super().reset()
+        for condition in self.conditions:
+            condition.reset()
+
+    def poll(self, driver, elapsed: float) -> Optional[bool]:
+        # Every condition is re-checked on each poll since stability can regress
+        results = [condition.poll(driver, elapsed) for condition in self.conditions]
+        hints = [c.ready_in for c, r in zip(self.conditions, results) if not r and c.ready_in is not None]
+        self.ready_in = max(hints) if hints else None
+        if None in results:
+            return None
+        if all(results):
+            return True
+        return None if self.timeout is not None and elapsed >= self.timeout else False
+
+
+class AnyOf(WaitCondition):
+    def __init__(self, *conditions: WaitCondition, timeout: Optional[float] = None):
+        super().__init__(timeout)
+        self.conditions = [c for cond in conditions for c in (cond.conditions if isinstance(cond, AnyOf) else [cond])]
+        self.name = ' | '.join(c.name for c in self.conditions)
+
+    def check(self, driver) -> bool:
+        return any(condition.check(driver) for condition in self.conditions)
+
+    def reset(self):
+        super().reset()
+        for condition in self.conditions:
+            condition.reset()
+
+    def poll(self, driver, elapsed: float) -> Optional[bool]:
+        results = []
+        for condition in self.conditions:
+            result = condition.poll(driver, elapsed)
+            if result:
+                return True
+            results.append(result)
+        hints = [c.ready_in for c in self.conditions if c.ready_in is not None]
+        self.ready_in = min(hints) if hints else None
+        if all(r is None for r in results):
+            return None
+        return None if self.timeout is not None and elapsed >= self.timeout else False
+
+
+def page_settled(quiet_for: float = 0.2, idle_for: float = 0.3) -> WaitCondition:
+    """
+    The page has finished loading, its network is idle and its DOM is quiet.
+    """
+    return NetworkIdle(idle_for) & DomQuiescent(quiet_for)
+
+
+class WaitEngine:
+    def __init__(self, driver, default_timeout: float = 10.0, min_interval: float = 0.02,
+                 max_interval: float = 0.5, backoff: float = 1.5, max_timings: int = 1000):
+        """
+        Polls readiness conditions with an adaptive interval: polling starts
+        fast, backs off while nothing is close to ready, and sleeps only as
+        long as a condition says it still needs when it can tell.
+        The last max_timings waits are kept in timings; summary() and the
+        waits count cover every wait.
+        """
+        self.driver = driver
+        self.default_timeout = default_timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timings = deque(maxlen=max_timings)
+        self.waits = 0
+        self._summary = {}
+
+    def until(self, condition: WaitCondition, timeout: Optional[float] = None,
+              raise_on_timeout: bool = True) -> bool:
+        """
+        Block until condition is satisfied. Returns True when it is, or False
+        on timeout when raise_on_timeout is off. Every wait is recorded in
+        self.timings and the summary.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        condition.reset()
+        start = time.monotonic()
+        interval = self.min_interval
+        polls = 0
+        while True:
+            elapsed = time.monotonic() - start
+            result = condition.poll(self.driver, elapsed)
+            polls += 1
+            if result or result is None or elapsed >= timeout:
+                break
+            delay = interval
+            if condition.ready_in is not None:
+                # Wake up right when the condition expects to be satisfied
+                delay = min(delay, condition.ready_in + self.min_interval)
+            time.sleep(max(self.min_interval, min(delay, timeout - elapsed)))
+            interval = min(self.max_interval, interval * self.backoff)
+
+        elapsed = time.monotonic() - start
+        satisfied = bool(result)
+        self.timings.append({'condition': condition.name, 'elapsed': elapsed, 'satisfied': satisfied, 'polls': polls})
+        self.waits += 1
+        entry = self._summary.setdefault(condition.name, {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+        entry['count'] += 1
+        entry['total'] += elapsed
+        entry['max'] = max(entry['max'], elapsed)
+        entry['timeouts'] += not satisfied
+        if not satisfied and raise_on_timeout:
+            raise TimeoutException(f"Timed out after {elapsed:.2f}s waiting for {condition.name}")
+        return satisfied
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Aggregate every wait per condition: count, total and max seconds, timeouts.
+        """
+        return {name: dict(entry) for name, entry in self._summary.items()}